@@ -1,4 +1,4 @@
 from .async_eval import async_eval as eval  # noqa
-from .async_eval import is_async_code
+from .async_eval import async_eval_in_frame, is_async_code
 
-__all__ = ["eval", "is_async_code"]
+__all__ = ["async_eval_in_frame", "eval", "is_async_code"]
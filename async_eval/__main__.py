@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import builtins
+import inspect
+import os
+import sys
+import types
+from ast import PyCF_ALLOW_TOP_LEVEL_AWAIT
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .async_eval import _cancel_pending_tasks
+from .cache import DiskCodeCache, default_cache_dir
+
+
+def _compile_script(source: bytes, filename: str) -> types.CodeType:
+    return compile(source, filename, "exec", flags=PyCF_ALLOW_TOP_LEVEL_AWAIT, dont_inherit=True)
+
+
+def _load_code(path: Path, use_cache: bool = True) -> types.CodeType:
+    source = path.read_bytes()
+    filename = str(path)
+
+    if not use_cache:
+        return _compile_script(source, filename)
+
+    cache = DiskCodeCache(default_cache_dir() / "scripts")
+
+    code = cache.get(source, filename)
+    if code is None:
+        code = _compile_script(source, filename)
+        cache.set(source, filename, code)
+
+    return code
+
+
+def run_script(path: Union[str, Path], *, use_cache: bool = True) -> Dict[str, Any]:
+    path = Path(path).absolute()
+    code = _load_code(path, use_cache)
+
+    # same as runpy.run_path, script should be importable as __main__ module (e.g. for pickle)
+    module = types.ModuleType("__main__")
+    _globals: Dict[str, Any] = vars(module)
+    _globals.update(
+        __file__=str(path),
+        __builtins__=builtins,
+        __package__=None,
+        __spec__=None,
+        __cached__=None,
+    )
+
+    main_module = sys.modules.get("__main__")
+    sys.modules["__main__"] = module
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        result = types.FunctionType(code, _globals)()
+
+        if inspect.iscoroutine(result):
+            loop.run_until_complete(result)
+    finally:
+        try:
+            _cancel_pending_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+            if main_module is not None:
+                sys.modules["__main__"] = main_module
+            else:  # pragma: no cover
+                del sys.modules["__main__"]
+
+    return _globals.copy()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m async_eval",
+        description="Run python script with top-level await support",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="do not use on-disk bytecode cache")
+    parser.add_argument("script", help="path to python script")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="script arguments")
+
+    args = parser.parse_args(argv)
+
+    sys.argv = [args.script, *args.args]
+    sys.path[0] = os.path.dirname(os.path.abspath(args.script))
+
+    run_script(args.script, use_cache=not args.no_cache)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
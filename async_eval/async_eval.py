@@ -1,20 +1,30 @@
 import ast
 import asyncio
+import builtins
+import hashlib
 import inspect
 import platform
 import sys
 import textwrap
+import time
 import types
+import warnings
 from asyncio import AbstractEventLoop
 from asyncio.tasks import _enter_task, _leave_task, current_task
 from concurrent.futures import ThreadPoolExecutor
 from contextvars import Context, copy_context
+from functools import lru_cache
 from typing import (
     Any,
     Awaitable,
     Callable,
     Dict,
+    Iterable,
+    List,
+    Mapping,
     Optional,
+    Protocol,
+    Set,
     Tuple,
     TypeVar,
     Union,
@@ -29,29 +39,53 @@ def is_pypy() -> bool:
     return platform.python_implementation().lower() == "pypy"
 
 
-try:
-    from _pydevd_bundle.pydevd_save_locals import save_locals as _save_locals
-except ImportError:  # pragma: no cover
-    import ctypes
+def _noop(*_: Any, **__: Any) -> Any:  # pragma: no cover
+    return None
+
+
+def _has_write_through_locals() -> bool:
+    # PEP 667: frame.f_locals is a write-through proxy since python 3.13
+    return sys.version_info >= (3, 13)
+
+
+def _select_save_locals() -> Callable[[types.FrameType], None]:
+    if is_pypy() or _has_write_through_locals():
+        return _noop
 
     try:
-        _ = ctypes.pythonapi
+        from _pydevd_bundle.pydevd_save_locals import save_locals as _save_locals
+    except ImportError:
+        pass
+    else:
+        return cast(Callable[[types.FrameType], None], _save_locals)
 
-        def _save_locals(frame: types.FrameType) -> None:
-            ctypes.pythonapi.PyFrame_LocalsToFast(ctypes.py_object(frame), ctypes.c_int(1))
-    except AttributeError:
+    try:
+        import ctypes
 
-        def _save_locals(frame: types.FrameType) -> None:
-            pass
+        prototype = ctypes.PYFUNCTYPE(None, ctypes.py_object, ctypes.c_int)
+        locals_to_fast = prototype(("PyFrame_LocalsToFast", ctypes.pythonapi))
+    except (ImportError, AttributeError):  # pragma: no cover
+        return _noop
 
+    def _save_locals(frame: types.FrameType) -> None:
+        locals_to_fast(frame, 1)
 
-def save_locals(frame: types.FrameType) -> None:
-    if not is_pypy():
-        _save_locals(frame)
+    return _save_locals
 
 
-def _noop(*_: Any, **__: Any) -> Any:  # pragma: no cover
-    return None
+_save_locals = _select_save_locals()
+
+_save_locals_hooks: List[Callable[[types.FrameType], None]] = []
+
+
+def notify_locals_changed(frame: types.FrameType) -> None:
+    for hook in _save_locals_hooks:
+        hook(frame)
+
+
+def save_locals(frame: types.FrameType) -> None:
+    _save_locals(frame)
+    notify_locals_changed(frame)
 
 
 def is_trio_running() -> bool:
@@ -95,9 +129,7 @@ async def __async_func__(_locals, _ctx=None):
         try:
             pass
         finally:
-            _locals.update(locals())
-            _locals.pop("_ctx", None)
-            _locals.pop("_locals", None)
+            _locals.update({k: v for k, v in locals().items() if k not in ("_ctx", "_locals")})
 
     if _ctx:
         for v in _ctx:
@@ -105,10 +137,7 @@ async def __async_func__(_locals, _ctx=None):
 
     from contextvars import copy_context
 
-    try:
-      return False, await __func_wrapper__(_locals), copy_context()
-    except Exception as excpz:
-       return True, excpz, copy_context()
+    return await __func_wrapper__(_locals), copy_context()
 """,
 )
 
@@ -133,7 +162,7 @@ def _make_stmt_as_return(parent: ASTWithBody, root: ast.AST, filename: str) -> t
         return _compile_ast(root, filename)
 
 
-def _transform_to_async(code: str, filename: str) -> types.CodeType:
+def _transform_to_async(code: str, filename: str, local_names: Tuple[str, ...] = ()) -> types.CodeType:
     base = ast.parse(_ASYNC_EVAL_CODE_TEMPLATE)
     module = ast.parse(code)
 
@@ -141,6 +170,8 @@ def _transform_to_async(code: str, filename: str) -> types.CodeType:
     try_stmt: ast.Try = cast(ast.Try, func.body[-1])
 
     try_stmt.body = module.body
+    # names bound to wrapper function locals, so they are read from _locals instead of globals
+    func.body[-1:-1] = [ast.parse(f"{name} = _locals[{name!r}]").body[0] for name in local_names]
 
     parent: ASTWithBody = module
     while isinstance(parent.body[-1], (ast.AsyncWith, ast.With)):
@@ -149,19 +180,58 @@ def _transform_to_async(code: str, filename: str) -> types.CodeType:
     return _make_stmt_as_return(parent, base, filename)
 
 
+class CodeCache(Protocol):
+    def get(self, source: str, filename: str) -> Optional[types.CodeType]:  # pragma: no cover
+        pass
+
+    def set(self, source: str, filename: str, code: types.CodeType) -> None:  # pragma: no cover
+        pass
+
+
+_code_cache: Optional[CodeCache] = None
+
+
+def set_code_cache(cache: Optional[CodeCache]) -> None:
+    global _code_cache
+    _code_cache = cache
+
+
+def _get_async_code(code: str, filename: str, local_names: Tuple[str, ...] = ()) -> types.CodeType:
+    cache = _code_cache
+
+    # code compiled for frame depends on its local names, so it isn't shared through cache
+    if cache is None or local_names:
+        return _transform_to_async(code, filename, local_names)
+
+    code_obj = cache.get(code, filename)
+    if code_obj is None:
+        code_obj = _transform_to_async(code, filename)
+        cache.set(code, filename, code_obj)
+
+    return code_obj
+
+
 def _compile_async_func(
     code: types.CodeType,
-    _locals: Dict[str, Any],
     _globals: Dict[str, Any],
-) -> Callable[[Dict[str, Any]], Awaitable[Tuple[bool, Any, Context]]]:
-    exec(code, _globals, _locals)
+) -> Callable[[Dict[str, Any]], Awaitable[Tuple[Any, Context]]]:
+    # define function in scratch namespace, _locals can be a frame locals proxy (PEP 667)
+    # that doesn't support removing names
+    namespace: Dict[str, Any] = {}
+    exec(code, _globals, namespace)
 
     return cast(
-        Callable[[Dict[str, Any]], Awaitable[Tuple[bool, Any, Context]]],
-        _locals.pop("__async_func__"),
+        Callable[[Dict[str, Any]], Awaitable[Tuple[Any, Context]]],
+        namespace["__async_func__"],
     )
 
 
+# parsed trees are shared between checks and must not be mutated
+@lru_cache(maxsize=256)
+def _parse(code: str) -> ast.Module:
+    return ast.parse(code)
+
+
 class _AsyncNodeFound(Exception):
     pass
 
@@ -170,7 +240,7 @@ class _AsyncCodeVisitor(ast.NodeVisitor):
     @classmethod
     def check(cls, code: str) -> bool:
         try:
-            node = ast.parse(code)
+            node = _parse(code)
         except SyntaxError:
             return False
 
@@ -219,11 +289,125 @@ def is_async_code(code: str) -> bool:
     return _AsyncCodeVisitor.check(code)
 
 
+class _FreeNamesVisitor(ast.NodeVisitor):
+    @classmethod
+    def collect(cls, node: ast.AST) -> Tuple[str, ...]:
+        visitor = cls()
+        visitor.visit(node)
+
+        return tuple(name for name in visitor.loaded if name not in visitor.bound)
+
+    def __init__(self) -> None:
+        self.bound: Set[str] = set()
+        self.loaded: Dict[str, None] = {}
+        self._deferred = 0
+
+    def _visit_deferred(self, nodes: Iterable[ast.AST]) -> None:
+        self._deferred += 1
+        try:
+            for node in nodes:
+                self.visit(node)
+        finally:
+            self._deferred -= 1
+
+    def visit_Name(self, node: ast.Name) -> Any:
+        if not isinstance(node.ctx, ast.Load):
+            self.bound.add(node.id)
+        elif not self._deferred:
+            self.loaded.setdefault(node.id)
+
+    def _visit_func(self, node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> Any:
+        self.bound.add(node.name)
+
+        # only decorators, defaults and annotations are evaluated at definition time
+        for n in (*node.decorator_list, node.args, *([node.returns] if node.returns else [])):
+            self.visit(n)
+
+        self._visit_deferred(node.body)
+
+    visit_AsyncFunctionDef = _visit_func
+    visit_FunctionDef = _visit_func
+
+    def visit_Lambda(self, node: ast.Lambda) -> Any:
+        self.visit(node.args)
+        self._visit_deferred([node.body])
+
+    def visit_arg(self, node: ast.arg) -> Any:
+        self.bound.add(node.arg)
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> Any:
+        self.bound.add(node.name)
+        self.generic_visit(node)
+
+    def visit_Import(self, node: Union[ast.Import, ast.ImportFrom]) -> Any:
+        for alias in node.names:
+            self.bound.add(alias.asname or alias.name.partition(".")[0])
+
+    visit_ImportFrom = visit_Import  # type: ignore
+
+    def _visit_scope_decl(self, node: Union[ast.Global, ast.Nonlocal]) -> Any:
+        self.bound.update(node.names)
+
+    visit_Global = _visit_scope_decl
+    visit_Nonlocal = _visit_scope_decl
+
+    def _visit_bound_name(self, node: ast.AST) -> Any:
+        for attr in ("name", "rest"):
+            name = getattr(node, attr, None)
+            if isinstance(name, str):
+                self.bound.add(name)
+
+        self.generic_visit(node)
+
+    visit_ExceptHandler = _visit_bound_name
+    visit_MatchAs = _visit_bound_name
+    visit_MatchStar = _visit_bound_name
+    visit_MatchMapping = _visit_bound_name
+
+    def _visit_try(self, node: ast.Try) -> Any:
+        # names used inside guarded block can be handled by the snippet itself
+        if not node.handlers:
+            return self.generic_visit(node)
+
+        self._visit_deferred(node.body)
+
+        for n in (*node.handlers, *node.orelse, *node.finalbody):
+            self.visit(n)
+
+        return None
+
+    visit_Try = _visit_try
+    visit_TryStar = _visit_try
+
+
+@lru_cache(maxsize=256)
+def _free_names(code: str) -> Tuple[str, ...]:
+    return _FreeNamesVisitor.collect(_parse(code))
+
+
+def find_unresolved_names(code: str, _globals: Dict[str, Any], _locals: Mapping[str, Any]) -> List[str]:
+    _builtins = _globals.get("__builtins__", builtins)
+    if not isinstance(_builtins, dict):
+        _builtins = vars(_builtins)
+
+    return [
+        name for name in _free_names(code) if name not in _locals and name not in _globals and name not in _builtins
+    ]
+
+
+def validate_code(code: str, _globals: Dict[str, Any], _locals: Mapping[str, Any]) -> None:
+    unresolved = find_unresolved_names(code, _globals, _locals)
+
+    if unresolved:
+        raise NameError(f"name {unresolved[0]!r} is not defined")
+
+
 T = TypeVar("T")
 
 
 @no_type_check
-def _asyncio_run_coro(coro: Awaitable[T]) -> T:
+def _asyncio_run_coro(coro: Awaitable[T], stats: Optional[Dict[str, Any]] = None) -> T:
     loop = get_current_loop()
 
     if not loop.is_running():
@@ -232,6 +416,7 @@ def _asyncio_run_coro(coro: Awaitable[T]) -> T:
     current = current_task(loop)
 
     t = loop.create_task(coro)
+    iterations = 0
 
     try:
         if current is not None:
@@ -239,12 +424,16 @@ def _asyncio_run_coro(coro: Awaitable[T]) -> T:
 
         while not t.done():
             loop._run_once()
+            iterations += 1
 
         return t.result()
     finally:
         if current is not None:
             _enter_task(loop, current)
 
+        if stats is not None:
+            stats["loop_iterations"] = iterations
+
 
 @no_type_check
 def _trio_run_coro(coro: Awaitable[T]) -> T:
@@ -258,11 +447,36 @@ def _trio_run_coro(coro: Awaitable[T]) -> T:
 
 
 @no_type_check
-def _run_coro(func: Callable[..., Awaitable[T]], _locals: Any) -> T:
+def _run_coro(func: Callable[..., Awaitable[T]], _locals: Any, stats: Optional[Dict[str, Any]] = None) -> T:
     if is_trio_running():
         return _trio_run_coro(func(_locals, copy_context()))
 
-    return _asyncio_run_coro(func(_locals))
+    return _asyncio_run_coro(func(_locals), stats)
+
+
+def _cancel_pending_tasks(loop: AbstractEventLoop, timeout: Optional[float] = None) -> Set["asyncio.Task[Any]"]:
+    tasks = asyncio.all_tasks(loop)
+
+    for task in tasks:
+        task.cancel()
+
+    if tasks:
+        gathered = asyncio.gather(*tasks, return_exceptions=True)
+        loop.run_until_complete(asyncio.wait([gathered], timeout=timeout))
+
+    # tasks that ignore cancellation are still pending when timeout expires
+    return {task for task in tasks if not task.done()}
+
+
+def _user_traceback(tb: Optional[types.TracebackType]) -> Optional[types.TracebackType]:
+    node = tb
+    while node is not None:
+        if node.tb_frame.f_code.co_name == "__func_wrapper__":
+            return node
+
+        node = node.tb_next
+
+    return tb
 
 
 def _reflect_context(ctx: Context) -> None:
@@ -270,6 +484,111 @@ def _reflect_context(ctx: Context) -> None:
         v.set(ctx[v])
 
 
+_audit_hook: Optional[Callable[[Dict[str, Any]], None]] = None
+
+
+def get_audit_hook() -> Optional[Callable[[Dict[str, Any]], None]]:
+    return _audit_hook
+
+
+def set_audit_hook(hook: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    global _audit_hook
+    _audit_hook = hook
+
+
+def _run_async_code_audited(
+    code: str,
+    _globals: Dict[str, Any],
+    _locals: Dict[str, Any],
+    filename: str,
+    validate: bool,
+    hook: Callable[[Dict[str, Any]], None],
+    local_names: Tuple[str, ...] = (),
+) -> Any:
+    event: Dict[str, Any] = {
+        "timestamp": time.time(),
+        "code_hash": hashlib.sha256(code.encode()).hexdigest()[:16],
+        "code": code,
+        "filename": filename,
+        "outcome": "ok",
+        "error": None,
+        "phase": None,
+        "loop_iterations": None,
+        "timings": {"validate": 0.0, "transform": 0.0, "compile": 0.0, "run": 0.0, "total": 0.0},
+    }
+    timings = event["timings"]
+
+    phase = "validate"
+    start = mark = time.perf_counter()
+
+    def _enter_phase(name: str) -> None:
+        nonlocal phase, mark
+
+        now = time.perf_counter()
+        timings[phase] = now - mark
+        phase, mark = name, now
+
+    try:
+        if validate:
+            validate_code(code, _globals, _locals)
+
+        verify_async_debug_available()
+        _enter_phase("transform")
+
+        code_obj = _get_async_code(code, filename, local_names)
+        _enter_phase("compile")
+
+        func = _compile_async_func(code_obj, _globals)
+        _enter_phase("run")
+
+        result, ctx = _run_coro(func, _locals, event)
+    except BaseException as exc:
+        event["outcome"] = "error"
+        event["error"] = type(exc).__qualname__
+        event["phase"] = phase
+        raise
+    else:
+        _reflect_context(ctx)
+
+        return result
+    finally:
+        _enter_phase(phase)
+        timings["total"] = mark - start
+
+        # broken sink must not replace evaluation result or exception
+        try:
+            hook(event)
+        except Exception as exc:
+            warnings.warn(f"Audit hook {hook!r} failed: {exc!r}", RuntimeWarning, stacklevel=2)
+
+
+def _run_async_code(
+    code: str,
+    _globals: Dict[str, Any],
+    _locals: Dict[str, Any],
+    filename: str,
+    validate: bool,
+    local_names: Tuple[str, ...] = (),
+) -> Any:
+    hook = _audit_hook
+    if hook is not None:
+        return _run_async_code_audited(code, _globals, _locals, filename, validate, hook, local_names)
+
+    # fail fast before any loop activity
+    if validate:
+        validate_code(code, _globals, _locals)
+
+    verify_async_debug_available()
+
+    code_obj = _get_async_code(code, filename, local_names)
+    func = _compile_async_func(code_obj, _globals)
+
+    result, ctx = _run_coro(func, _locals)
+    _reflect_context(ctx)
+
+    return result
+
+
 # async equivalent of builtin eval function
 def async_eval(
     code: str,
@@ -277,9 +596,8 @@ def async_eval(
     _locals: Optional[Dict[str, Any]] = None,
     *,
     filename: str = "<eval>",
+    validate: bool = False,
 ) -> Any:
-    verify_async_debug_available()
-
     caller: types.FrameType = inspect.currentframe().f_back  # type: ignore
 
     if _locals is None:
@@ -288,25 +606,62 @@ def async_eval(
     if _globals is None:
         _globals = caller.f_globals
 
-    code_obj = _transform_to_async(code, filename)
-    func = _compile_async_func(code_obj, _locals, _globals)
+    try:
+        return _run_async_code(code, _globals, _locals, filename, validate)
+    except Exception as exc:
+        raise exc.with_traceback(_user_traceback(exc.__traceback__))  # noqa: B904
+    finally:
+        save_locals(caller)
+
 
+# frame locals that snippet refers to, except names it declares global or nonlocal
+def _frame_local_names(code: str, _locals: Mapping[str, Any]) -> Tuple[str, ...]:
     try:
-        is_exc, result, ctx = _run_coro(func, _locals)
+        module = _parse(code)
+    except SyntaxError:
+        # reported by transform
+        return ()
 
-        _reflect_context(ctx)
+    names: Set[str] = set()
+    declared: Set[str] = {"_ctx", "_locals"}
 
-        if is_exc:
-            raise result
+    for node in ast.walk(module):
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            declared.update(node.names)
 
-        return result
+    return tuple(sorted(name for name in names - declared if name in _locals))
+
+
+# evaluate async code directly against frame namespace
+def async_eval_in_frame(
+    code: str,
+    frame: types.FrameType,
+    *,
+    filename: str = "<eval>",
+    validate: bool = False,
+) -> Any:
+    _locals = frame.f_locals
+    # frame globals are used as is, so "global" statements and functions defined by snippet see module
+    # namespace, while frame locals that snippet refers to are bound as locals of wrapper function
+    _globals = frame.f_globals
+    local_names = _frame_local_names(code, _locals)
+
+    try:
+        return _run_async_code(code, _globals, _locals, filename, validate, local_names)
+    except Exception as exc:
+        raise exc.with_traceback(_user_traceback(exc.__traceback__))  # noqa: B904
     finally:
-        save_locals(caller)
+        save_locals(frame)
 
 
 sys.__async_eval__ = async_eval  # type: ignore
 
 __all__ = [
     "async_eval",
+    "async_eval_in_frame",
+    "find_unresolved_names",
     "is_async_code",
+    "validate_code",
 ]
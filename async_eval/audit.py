@@ -0,0 +1,136 @@
+import argparse
+import json
+import statistics
+import threading
+from collections import deque
+from contextlib import suppress
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, Iterable, List, Optional, Union
+
+from .async_eval import async_eval, get_audit_hook, set_audit_hook
+
+Event = Dict[str, Any]
+
+NOT_REPLAYABLE = "not-replayable"
+
+
+class AuditLog:
+    def __init__(self, maxlen: Optional[int] = 1024, *, path: Union[str, Path, None] = None) -> None:
+        self.events: Deque[Event] = deque(maxlen=maxlen)
+        self.path = Path(path) if path is not None else None
+
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+
+    def record(self, event: Event) -> None:
+        self.events.append(event)
+
+        if self.path is not None:
+            line = json.dumps(event, default=repr)
+
+            with self._lock:
+                if self._file is None:
+                    self._file = self.path.open("a", encoding="utf-8")
+
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def install(self) -> "AuditLog":
+        set_audit_hook(self.record)
+        return self
+
+    def uninstall(self) -> None:
+        if get_audit_hook() == self.record:
+            set_audit_hook(None)
+
+    def close(self) -> None:
+        self.uninstall()
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "AuditLog":
+        return self.install()
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def load_events(path: Union[str, Path]) -> List[Event]:
+    with Path(path).open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(
+    events: Iterable[Event],
+    _globals: Optional[Dict[str, Any]] = None,
+    *,
+    repeat: int = 1,
+) -> List[Event]:
+    replayed: List[Event] = []
+    runs: List[Event] = []
+    prev_hook = get_audit_hook()
+
+    set_audit_hook(runs.append)
+    try:
+        for event in events:
+            for _ in range(repeat):
+                namespace = dict(_globals or {})
+                runs.clear()
+
+                # failures are recorded by audit hook
+                with suppress(Exception):
+                    async_eval(event["code"], namespace, namespace, filename=event["filename"], validate=True)
+
+                # outermost evaluation is recorded last
+                run = runs[-1]
+
+                # snippet depends on names from original process namespace
+                if run["phase"] == "validate" and event.get("phase") != "validate":
+                    run = {**run, "outcome": NOT_REPLAYABLE}
+
+                replayed.append(run)
+    finally:
+        set_audit_hook(prev_hook)
+
+    return replayed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m async_eval.audit",
+        description="Replay evaluations recorded by async_eval audit log",
+    )
+    parser.add_argument("path", help="path to JSONL audit log")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times to replay each snippet")
+
+    args = parser.parse_args(argv)
+    events = load_events(args.path)
+
+    replayed = replay(events, repeat=args.repeat)
+
+    print(f"{'code hash':<16}  {'recorded ms':>12}  {'replay ms':>12}  outcome")
+    for i, event in enumerate(events):
+        runs = replayed[i * args.repeat : (i + 1) * args.repeat]
+
+        if runs[-1]["outcome"] == NOT_REPLAYABLE:
+            replay_ms = f"{'-':>12}"
+        else:
+            replay_ms = f"{statistics.median(run['timings']['total'] for run in runs) * 1000:>12.3f}"
+
+        print(
+            f"{event['code_hash']:<16}  {event['timings']['total'] * 1000:>12.3f}  {replay_ms}  {runs[-1]['outcome']}",
+        )
+
+
+__all__ = [
+    "NOT_REPLAYABLE",
+    "AuditLog",
+    "load_events",
+    "replay",
+]
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,220 @@
+import hashlib
+import importlib.util
+import marshal
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from .async_eval import _ASYNC_EVAL_CODE_TEMPLATE, set_code_cache
+
+Source = Union[str, bytes]
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+DEFAULT_MEMORY_SIZE = 256
+
+
+def default_cache_dir() -> Path:
+    if sys.platform == "win32":  # pragma: no cover
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+
+    return Path(base) / "async_eval"
+
+
+def _as_bytes(value: Source) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+class DiskCodeCache:
+    suffix = ".bin"
+    # eviction is ordered by mtime, so memory hits refresh it, but not more often than this (seconds)
+    touch_interval = 60.0
+
+    def __init__(
+        self,
+        directory: Union[str, Path, None] = None,
+        *,
+        max_size: int = DEFAULT_MAX_SIZE,
+        memory_size: int = DEFAULT_MEMORY_SIZE,
+        salt: Source = b"",
+    ) -> None:
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_size = max_size
+        self.memory_size = memory_size
+        self.salt = _as_bytes(salt)
+
+        self._lock = threading.Lock()
+        # key -> (code, last time entry file mtime was refreshed)
+        self._memory: "OrderedDict[str, Tuple[types.CodeType, float]]" = OrderedDict()
+        # running total of directory size, computed lazily on first write
+        self._size: Optional[int] = None
+
+    def _key(self, source: Source, filename: str) -> str:
+        h = hashlib.sha256(importlib.util.MAGIC_NUMBER)
+        for part in (self.salt, filename.encode(), _as_bytes(source)):
+            h.update(len(part).to_bytes(8, "little"))
+            h.update(part)
+
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _remember(self, key: str, code: types.CodeType) -> None:
+        with self._lock:
+            self._memory[key] = (code, time.monotonic())
+            self._memory.move_to_end(key)
+
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def get(self, source: Source, filename: str) -> Optional[types.CodeType]:
+        key = self._key(source, filename)
+        path = self._path(key)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+
+                code, touched = entry
+                if time.monotonic() - touched < self.touch_interval:
+                    return code
+
+                self._memory[key] = (code, time.monotonic())
+
+        if entry is not None:
+            with suppress(OSError):
+                os.utime(path)
+
+            return code
+
+        try:
+            code = marshal.loads(path.read_bytes())  # noqa: S302
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if not isinstance(code, types.CodeType):
+            return None
+
+        with suppress(OSError):
+            os.utime(path)
+
+        self._remember(key, code)
+        return code
+
+    def set(self, source: Source, filename: str, code: types.CodeType) -> None:
+        key = self._key(source, filename)
+        self._remember(key, code)
+
+        data = marshal.dumps(code)
+        path = self._path(key)
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+
+                # entry can be rewritten, e.g. after concurrent miss in other process
+                replaced = 0
+                with suppress(OSError):
+                    replaced = path.stat().st_size
+
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            return
+
+        if self._size is None:
+            self._size = self._directory_size()
+        else:
+            self._size += len(data) - replaced
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def _directory_size(self) -> int:
+        size = 0
+        for path in self.directory.glob(f"*{self.suffix}"):
+            with suppress(OSError):
+                size += path.stat().st_size
+
+        return size
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:  # pragma: no cover
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+
+            try:
+                path.unlink()
+            except OSError:  # pragma: no cover
+                continue
+
+            total -= size
+
+            with self._lock:
+                self._memory.pop(path.stem, None)
+
+        self._size = total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+        for path in self.directory.glob(f"*{self.suffix}"):
+            with suppress(OSError):
+                path.unlink()
+
+        self._size = None
+
+
+def enable_disk_cache(
+    directory: Union[str, Path, None] = None,
+    *,
+    max_size: int = DEFAULT_MAX_SIZE,
+) -> DiskCodeCache:
+    cache = DiskCodeCache(
+        directory if directory is not None else default_cache_dir() / "snippets",
+        max_size=max_size,
+        salt=_ASYNC_EVAL_CODE_TEMPLATE,
+    )
+    set_code_cache(cache)
+
+    return cache
+
+
+def disable_disk_cache() -> None:
+    set_code_cache(None)
+
+
+__all__ = [
+    "DiskCodeCache",
+    "default_cache_dir",
+    "disable_disk_cache",
+    "enable_disk_cache",
+]
@@ -0,0 +1,275 @@
+import inspect
+import keyword
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import partial
+from types import CoroutineType, FrameType, GeneratorType
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+try:  # pragma: no cover
+    # names are already defined when module is embedded into pydevd main script
+    _ = async_eval_in_frame  # type: ignore  # noqa
+except NameError:  # pragma: no cover
+    from .async_eval import _save_locals_hooks, async_eval_in_frame, is_async_code
+
+_MISSING = object()
+
+_DOTTED_NAME_RE = re.compile(r"[A-Za-z_][\w.]*$")
+_NAME_RE = re.compile(r"\w*$")
+_CALL_TAIL_RE = re.compile(r"[\w)\]]\s*$")
+
+
+class Completion(NamedTuple):
+    name: str
+    type: str
+    is_async: bool
+
+
+# only static lookups are used, so proxy objects with __getattr__ are never triggered
+def _unwrap(obj: Any) -> Any:
+    seen: Set[int] = set()
+
+    while id(obj) not in seen:
+        seen.add(id(obj))
+
+        if isinstance(obj, (staticmethod, classmethod)):
+            obj = obj.__func__
+        elif isinstance(obj, partial):
+            obj = obj.func
+        else:
+            wrapped = inspect.getattr_static(obj, "__wrapped__", _MISSING)
+            if wrapped is _MISSING:
+                break
+
+            obj = wrapped
+
+    return obj
+
+
+def is_async_callable(obj: Any) -> bool:
+    obj = _unwrap(obj)
+
+    if inspect.isclass(obj):
+        return False
+
+    if inspect.isroutine(obj):
+        return inspect.iscoroutinefunction(obj) or inspect.isasyncgenfunction(obj)
+
+    call = inspect.getattr_static(type(obj), "__call__", None)
+    return call is not None and inspect.iscoroutinefunction(_unwrap(call))
+
+
+def is_awaitable(obj: Any) -> bool:
+    if isinstance(obj, (CoroutineType, GeneratorType)):
+        return inspect.isawaitable(obj)
+
+    return inspect.getattr_static(type(obj), "__await__", None) is not None or is_async_callable(obj)
+
+
+def _make_completion(name: str, value: Any) -> Completion:
+    return Completion(name, type(value).__name__, is_awaitable(value))
+
+
+_KEYWORDS = [Completion(name, "keyword", False) for name in keyword.kwlist]
+
+
+class _Index:
+    __slots__ = ("entries", "names")
+
+    def __init__(self, items: Iterable[Tuple[str, Any]]) -> None:
+        self.entries: Dict[str, Completion] = {name: _make_completion(name, value) for name, value in items}
+        self.names: List[str] = sorted(self.entries)
+
+    def complete(self, prefix: str) -> List[Completion]:
+        result = []
+
+        for i in range(bisect_left(self.names, prefix), len(self.names)):
+            name = self.names[i]
+            if not name.startswith(prefix):
+                break
+
+            result.append(self.entries[name])
+
+        return result
+
+
+def _attributes(obj: Any) -> Iterable[Tuple[str, Any]]:
+    try:
+        names = dir(obj)
+    except Exception:  # pragma: no cover
+        return ()
+
+    return ((name, inspect.getattr_static(obj, name, None)) for name in names)
+
+
+def _lookup(frame: FrameType, name: str) -> Any:
+    for namespace in (frame.f_locals, frame.f_globals, frame.f_builtins):
+        if name in namespace:
+            return namespace[name]
+
+    return _MISSING
+
+
+# entry doesn't reference frame or its values, so cached entries don't keep dead frames alive
+class _FrameEntry:
+    __slots__ = ("attributes", "code", "lasti", "names")
+
+    def __init__(self, frame: FrameType) -> None:
+        self.code = frame.f_code
+        self.lasti = frame.f_lasti
+
+        self.names = _Index({**frame.f_builtins, **frame.f_globals, **frame.f_locals}.items())
+        self.attributes: Dict[str, _Index] = {}
+
+    def is_valid(self, frame: FrameType) -> bool:
+        return self.code is frame.f_code and self.lasti == frame.f_lasti
+
+
+def _find_group_start(text: str) -> Optional[int]:
+    depth = 0
+
+    for i in range(len(text) - 1, -1, -1):
+        if text[i] == ")":
+            depth += 1
+        elif text[i] == "(":
+            depth -= 1
+
+            if depth == 0:
+                return i
+
+    return None
+
+
+def _evaluate(expr: str, frame: FrameType) -> Any:
+    return async_eval_in_frame(expr, frame, validate=True)
+
+
+class CompletionService:
+    def __init__(self, maxsize: int = 16, evaluate: Callable[[str, FrameType], Any] = _evaluate) -> None:
+        self.maxsize = maxsize
+        self.evaluate = evaluate
+
+        self._frames: "OrderedDict[int, _FrameEntry]" = OrderedDict()
+        self._evaluating: Set[int] = set()
+
+        _save_locals_hooks.append(self.invalidate)
+
+    def close(self) -> None:
+        self.clear()
+
+        if self.invalidate in _save_locals_hooks:
+            _save_locals_hooks.remove(self.invalidate)
+
+    def __enter__(self) -> "CompletionService":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def invalidate(self, frame: FrameType) -> None:
+        # locals written back by evaluation of completed expression itself, so its result stays cached
+        if id(frame) in self._evaluating:
+            return
+
+        self._frames.pop(id(frame), None)
+
+    def clear(self) -> None:
+        self._frames.clear()
+
+    def _entry(self, frame: FrameType) -> _FrameEntry:
+        key = id(frame)
+        entry = self._frames.get(key)
+
+        if entry is None or not entry.is_valid(frame):
+            entry = self._frames[key] = _FrameEntry(frame)
+
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+        else:
+            self._frames.move_to_end(key)
+
+        return entry
+
+    def names(self, frame: FrameType) -> Dict[str, Completion]:
+        return dict(self._entry(frame).names.entries)
+
+    def awaitables(self, frame: FrameType) -> List[str]:
+        entry = self._entry(frame)
+        return [name for name in entry.names.names if entry.names.entries[name].is_async]
+
+    def _resolve(self, frame: FrameType, expr: str) -> Any:
+        if is_async_code(expr):
+            self._evaluating.add(id(frame))
+            try:
+                return self.evaluate(expr, frame)
+            finally:
+                self._evaluating.discard(id(frame))
+
+        first, *rest = expr.split(".")
+        obj = _lookup(frame, first)
+
+        for name in rest:
+            if obj is _MISSING:
+                break
+
+            obj = inspect.getattr_static(obj, name, _MISSING)
+
+            # value of property or slot is known only after running descriptor code
+            if inspect.isdatadescriptor(obj):
+                return _MISSING
+
+        return obj
+
+    def _attributes_index(self, entry: _FrameEntry, frame: FrameType, expr: str) -> Optional[_Index]:
+        index = entry.attributes.get(expr)
+
+        if index is None:
+            try:
+                obj = self._resolve(frame, expr)
+            except Exception:
+                return None
+
+            if obj is _MISSING:
+                return None
+
+            index = entry.attributes[expr] = _Index(_attributes(obj))
+
+        return index
+
+    def complete(self, frame: FrameType, text: str) -> List[Completion]:
+        entry = self._entry(frame)
+
+        match = _NAME_RE.search(text)
+        prefix, head = match.group(), text[: match.start()].rstrip()  # type: ignore
+
+        if not head.endswith("."):
+            return [*entry.names.complete(prefix), *(kw for kw in _KEYWORDS if kw.name.startswith(prefix))]
+
+        head = head[:-1].rstrip()
+        if head.endswith(")"):
+            # only parenthesized async expressions are evaluated, e.g. (await get_client()).
+            start = _find_group_start(head)
+            if start is None or _CALL_TAIL_RE.search(head[:start]):
+                return []
+
+            expr = head[start + 1 : -1]
+            if not is_async_code(expr):
+                return []
+        else:
+            match = _DOTTED_NAME_RE.search(head)
+            if match is None:
+                return []
+
+            expr = match.group()
+
+        index = self._attributes_index(entry, frame, expr)
+        return index.complete(prefix) if index is not None else []
+
+
+__all__ = [
+    "Completion",
+    "CompletionService",
+    "is_async_callable",
+    "is_awaitable",
+]
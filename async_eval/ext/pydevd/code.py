@@ -1,3 +1,5 @@
+import sys
+from functools import partial
 from typing import Any
 
 
@@ -7,29 +9,72 @@ def _noop(*_: Any, **__: Any) -> Any:  # pragma: no cover
 
 try:  # pragma: no cover
     # only for testing purposes
+    _ = async_eval_in_frame  # type: ignore  # noqa
     _ = is_async_code  # type: ignore  # noqa
+    _ = notify_locals_changed  # type: ignore  # noqa
     _ = verify_async_debug_available  # type: ignore  # noqa
+    _ = EvaluationScheduler  # type: ignore  # noqa
+    _ = Lane  # type: ignore  # noqa
+    _ = CompletionService  # type: ignore  # noqa
 except NameError:  # pragma: no cover
     try:
-        from async_eval.async_eval import is_async_code
+        from async_eval.async_eval import async_eval_in_frame, is_async_code, notify_locals_changed
         from async_eval.asyncio_patch import verify_async_debug_available
+        from async_eval.completion import CompletionService
+        from async_eval.scheduler import EvaluationScheduler, Lane
     except ImportError:
+        async_eval_in_frame = _noop  # type: ignore
         is_async_code = _noop  # type: ignore
+        notify_locals_changed = _noop  # type: ignore
         verify_async_debug_available = _noop  # type: ignore
+        EvaluationScheduler = Lane = CompletionService = None  # type: ignore
 
 
-def make_code_async(code: str) -> str:
+def make_code_async(code: str, hook: str = "__async_eval__") -> str:
     if not code:
         return code
 
     original_code = code.replace("@" + "LINE" + "@", "\n")
 
     if is_async_code(original_code):
-        return f"__import__('sys').__async_eval__({original_code!r}, globals(), locals())"
+        return f"__import__('sys').{hook}({original_code!r}, globals(), locals())"
 
     return code
 
 
+# 0. Schedule evaluations: breakpoint conditions go ahead of console commands
+from _pydevd_bundle.pydevd_constants import get_global_debugger
+
+scheduler = EvaluationScheduler() if EvaluationScheduler is not None else None
+
+
+def request_client(dbg: Any = None) -> Any:
+    # every IDE connection has its own writer, requests from the same connection share client limits
+    if dbg is None:
+        dbg = get_global_debugger()
+
+    return getattr(dbg, "writer", dbg)
+
+
+def schedule(func: Any, lane: Any, key: Any = None, client: Any = None, loop: Any = None) -> Any:
+    if scheduler is None:  # pragma: no cover
+        return func()
+
+    return scheduler.run(func, lane=lane, client=client, loop=loop, key=key)
+
+
+def async_eval_condition(code: str, _globals: Any, _locals: Any) -> Any:
+    return schedule(
+        partial(sys.__async_eval__, code, _globals, _locals, validate=True),  # type: ignore
+        Lane.CONDITION,
+        (id(_locals), code),
+        request_client(),
+    )
+
+
+sys.__async_eval_condition__ = async_eval_condition  # type: ignore
+
+
 # 1. Add ability to evaluate async expression
 from _pydevd_bundle import pydevd_save_locals, pydevd_vars
 
@@ -37,12 +82,30 @@ original_evaluate = pydevd_vars.evaluate_expression
 
 
 def evaluate_expression(thread_id: object, frame_id: object, expression: str, doExec: bool) -> Any:
-    if is_async_code(expression):
+    code = expression.replace("@" + "LINE" + "@", "\n")
+
+    if is_async_code(code):
         verify_async_debug_available()
-        doExec = False
+
+        frame = pydevd_vars.find_frame(thread_id, frame_id)
+        if frame is None:
+            return None
+
+        try:
+            return schedule(
+                partial(async_eval_in_frame, code, frame, validate=True),
+                Lane.EXPRESSION,
+                (id(frame), code),
+                request_client(),
+                thread_id,
+            )
+        except Exception:
+            return pydevd_vars.get_eval_exception_msg(code, frame.f_locals)
+        finally:
+            del frame
 
     try:
-        return original_evaluate(thread_id, frame_id, make_code_async(expression), doExec)
+        return original_evaluate(thread_id, frame_id, expression, doExec)
     finally:
         frame = pydevd_vars.find_frame(thread_id, frame_id)
 
@@ -53,13 +116,24 @@ def evaluate_expression(thread_id: object, frame_id: object, expression: str, do
 
 pydevd_vars.evaluate_expression = evaluate_expression  # type: ignore
 
+# Keep async-aware caches in sync with locals written back by pydevd itself
+original_save_locals = pydevd_save_locals.save_locals
+
+
+def save_locals(frame: Any) -> None:
+    original_save_locals(frame)
+    notify_locals_changed(frame)
+
+
+pydevd_save_locals.save_locals = save_locals  # type: ignore
+
 # 2. Add ability to use async breakpoint conditions
 from _pydevd_bundle.pydevd_breakpoints import LineBreakpoint
 
 
 def normalize_line_breakpoint(line_breakpoint: LineBreakpoint) -> None:
     line_breakpoint.expression = make_code_async(line_breakpoint.expression)
-    line_breakpoint.condition = make_code_async(line_breakpoint.condition)
+    line_breakpoint.condition = make_code_async(line_breakpoint.condition, "__async_eval_condition__")
 
 
 original_init = LineBreakpoint.__init__
@@ -86,7 +160,29 @@ original_console_exec = pydevd_console_integration.console_exec
 
 
 def console_exec(thread_id: object, frame_id: object, expression: str, dbg: Any) -> Any:
-    return original_console_exec(thread_id, frame_id, make_code_async(expression), dbg)
+    code = expression.replace("@" + "LINE" + "@", "\n")
+
+    if not is_async_code(code):
+        return original_console_exec(thread_id, frame_id, expression, dbg)
+
+    frame = pydevd_vars.find_frame(thread_id, frame_id)
+
+    try:
+        sys.displayhook(
+            schedule(
+                partial(async_eval_in_frame, code, frame),
+                Lane.CONSOLE,
+                client=request_client(dbg),
+                loop=thread_id,
+            ),
+        )
+    except Exception:
+        pydevd_console_integration.ConsoleWriter().showtraceback()
+        return False, True
+    finally:
+        del frame
+
+    return False, False
 
 
 pydevd_console_integration.console_exec = console_exec  # type: ignore
@@ -104,7 +200,75 @@ def command_run(self: Command) -> None:
 
 Command.run = command_run  # type: ignore
 
-import sys
+# 5. Serve console completions from async-aware per-frame cache
+from _pydev_bundle import _pydev_completer
+from _pydev_bundle._pydev_imports_tipper import TYPE_ATTR, TYPE_CLASS, TYPE_FUNCTION
+from _pydevd_bundle import pydevd_xml
+
+
+# completed async expressions (e.g. "(await get_client()).") share expression lane with evaluations
+def evaluate_completion(expr: str, frame: Any) -> Any:
+    return schedule(
+        partial(async_eval_in_frame, expr, frame, validate=True),
+        Lane.EXPRESSION,
+        (id(frame), expr),
+        request_client(),
+    )
+
+
+completion_service = CompletionService(evaluate=evaluate_completion) if CompletionService is not None else None
+
+original_generate_completions_as_xml = _pydev_completer.generate_completions_as_xml
+
+_FUNCTION_TYPES = {
+    "builtin_function_or_method",
+    "classmethod",
+    "function",
+    "method",
+    "method_descriptor",
+    "staticmethod",
+}
+
+
+def _completion_xml(value: str) -> str:
+    return pydevd_xml.make_valid_xml_value(pydevd_xml.quote(value, "/>_= \t"))  # type: ignore
+
+
+def _completion_type(completion: Any) -> str:
+    if completion.type == "type":
+        return TYPE_CLASS  # type: ignore
+
+    if completion.is_async or completion.type in _FUNCTION_TYPES:
+        return TYPE_FUNCTION  # type: ignore
+
+    return TYPE_ATTR  # type: ignore
+
+
+def generate_completions_as_xml(frame: Any, act_tok: str) -> str:
+    if frame is None or completion_service is None:
+        return original_generate_completions_as_xml(frame, act_tok)  # type: ignore
+
+    completions = completion_service.complete(frame, act_tok)
+    if not completions:  # e.g. attributes of evaluated expressions
+        return original_generate_completions_as_xml(frame, act_tok)  # type: ignore
+
+    msg = ["<xml>"]
+    for completion in completions:
+        description = f"async {completion.type}" if completion.is_async else completion.type
+
+        msg.append(
+            f'<comp p0="{_completion_xml(completion.name)}" '
+            f'p1="{_completion_xml(description)}" '
+            f'p2="" '
+            f'p3="{_completion_type(completion)}"/>',
+        )
+    msg.append("</xml>")
+
+    return "".join(msg)
+
+
+_pydev_completer.generate_completions_as_xml = generate_completions_as_xml  # type: ignore
+
 from runpy import run_path
 
 if __name__ == "__main__":  # pragma: no cover
@@ -1,6 +1,6 @@
 import inspect
 
-from async_eval import async_eval
+from async_eval import async_eval, completion, scheduler
 
 from . import code
 
@@ -10,6 +10,8 @@ def generate_main_script() -> str:
         inspect.getsource(m)
         for m in (
             async_eval,
+            scheduler,
+            completion,
             code,
         )
     )
@@ -0,0 +1,323 @@
+import asyncio
+import os
+import signal
+import threading
+from asyncio import AbstractEventLoop
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, suppress
+from functools import lru_cache, partial
+from types import FrameType
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple, cast
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+from .async_eval import _cancel_pending_tasks, _compile_async_func, _transform_to_async, _user_traceback
+
+# time given to worker to report timeout itself before it's killed by parent process
+KILL_GRACE = 1.0
+CANCEL_TIMEOUT = 0.5
+
+_KILL_SIGNAL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+_loop: Optional[AbstractEventLoop] = None
+
+_transform_to_async_cached = lru_cache(maxsize=256)(_transform_to_async)
+
+
+# BaseException, so user code can't swallow it with "except Exception"
+class _Deadline(BaseException):
+    pass
+
+
+def _init_worker() -> None:
+    global _loop
+
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+
+def _raise_timeout(_: int, __: Optional[FrameType]) -> None:
+    raise _Deadline
+
+
+@contextmanager
+def _time_limit(timeout: Optional[float]) -> Iterator[None]:
+    if timeout is None or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    prev = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, prev)
+
+
+@contextmanager
+def _memory_limit(limit: Optional[int]) -> Iterator[None]:
+    if limit is None or resource is None:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _evaluate(
+    code: str,
+    _globals: Dict[str, Any],
+    _locals: Dict[str, Any],
+    filename: str,
+    timeout: Optional[float],
+    memory_limit: Optional[int],
+) -> Any:
+    if _loop is None:
+        _init_worker()
+
+    loop = cast(AbstractEventLoop, _loop)
+
+    code_obj = _transform_to_async_cached(code, filename)
+    func = _compile_async_func(code_obj, _globals)
+
+    try:
+        with _time_limit(timeout), _memory_limit(memory_limit):
+            result, _ = loop.run_until_complete(func(_locals))
+    except _Deadline:
+        raise TimeoutError("Evaluation timed out") from None
+    except Exception as exc:
+        raise exc.with_traceback(_user_traceback(exc.__traceback__))  # noqa: B904
+    finally:
+        if _cancel_pending_tasks(loop, CANCEL_TIMEOUT):
+            # tasks ignoring cancellation would keep running during next evaluations
+            loop.close()
+            _init_worker()
+
+    return result
+
+
+def _picklable_namespace(namespace: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if namespace is None:
+        return {}
+
+    return {k: v for k, v in namespace.items() if k != "__builtins__"}
+
+
+# each worker is a separate single process executor, so hung or crashed worker can be replaced alone
+class _Worker:
+    def __init__(self) -> None:
+        self.executor = ProcessPoolExecutor(1, initializer=_init_worker)
+        self.pid: "Future[int]" = self.executor.submit(os.getpid)
+
+    def kill(self) -> None:
+        with suppress(ProcessLookupError):
+            os.kill(self.pid.result(), _KILL_SIGNAL)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+
+class _Call:
+    __slots__ = ("args", "expired", "finished", "future", "timeout")
+
+    def __init__(self, args: Tuple[Any, ...], timeout: Optional[float]) -> None:
+        self.args = args
+        self.timeout = timeout
+        self.future: "Future[Any]" = Future()
+        self.expired = False
+        self.finished = False
+
+
+class ProcessPoolEvaluator:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        *,
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+        prewarm: bool = True,
+    ) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+
+        self._lock = threading.RLock()
+        self._shutdown = False
+        self._pending: Deque[_Call] = deque()
+        self._outstanding: Set["Future[Any]"] = set()
+        self._workers: List[_Worker] = [_Worker() for _ in range(self.max_workers)]
+        self._idle: List[_Worker] = [*self._workers]
+        self._retired: List[_Worker] = []
+
+        if prewarm:
+            self.prewarm()
+
+    def prewarm(self) -> None:
+        with self._lock:
+            workers = [*self._workers]
+
+        for worker in workers:
+            worker.pid.result()
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            while self._pending and self._idle:
+                call = self._pending.popleft()
+
+                if call.future.set_running_or_notify_cancel():
+                    self._start(self._idle.pop(), call)
+                else:
+                    self._outstanding.discard(call.future)
+
+    # killed or crashed worker leaves its executor broken, so it's replaced before its call is settled.
+    # Broken executor is kept referenced until shutdown, collecting it from inside of its own
+    # management thread (done callback) deadlocks.
+    def _replace(self, worker: _Worker) -> _Worker:
+        with self._lock:
+            self._workers.remove(worker)
+            self._retired.append(worker)
+
+            worker = _Worker()
+            self._workers.append(worker)
+
+        return worker
+
+    def _start(self, worker: _Worker, call: _Call) -> None:
+        try:
+            inner = worker.executor.submit(_evaluate, *call.args)
+        except BrokenProcessPool:
+            # worker died while idle (e.g. killed by OOM killer)
+            worker = self._replace(worker)
+            inner = worker.executor.submit(_evaluate, *call.args)
+
+        timer = None
+        if call.timeout is not None:
+            timer = threading.Timer(call.timeout + KILL_GRACE, self._expire, (worker, call))
+            timer.daemon = True
+            timer.start()
+
+        inner.add_done_callback(partial(self._done, worker, call, timer))
+
+    def _expire(self, worker: _Worker, call: _Call) -> None:
+        # worker didn't manage to stop evaluation itself (e.g. blocked in C code)
+        with self._lock:
+            if not call.finished:
+                call.expired = True
+                worker.kill()
+
+    def _done(self, worker: _Worker, call: _Call, timer: Optional[threading.Timer], inner: "Future[Any]") -> None:
+        if timer is not None:
+            timer.cancel()
+
+        exc = inner.exception()
+
+        with self._lock:
+            call.finished = True
+            self._outstanding.discard(call.future)
+
+            # expired worker is killed even if its result arrived in the meantime
+            if call.expired or isinstance(exc, BrokenProcessPool):
+                worker = self._replace(worker)
+
+            self._idle.append(worker)
+
+        if call.expired:
+            call.future.set_exception(TimeoutError("Evaluation timed out"))
+        elif exc is not None:
+            call.future.set_exception(exc)
+        else:
+            call.future.set_result(inner.result())
+
+        self._dispatch()
+
+    def submit(
+        self,
+        code: str,
+        _globals: Optional[Dict[str, Any]] = None,
+        _locals: Optional[Dict[str, Any]] = None,
+        *,
+        filename: str = "<eval>",
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+    ) -> "Future[Any]":
+        _globals = _picklable_namespace(_globals)
+        _locals = _globals if _locals is None else _picklable_namespace(_locals)
+
+        timeout = self.timeout if timeout is None else timeout
+        memory_limit = self.memory_limit if memory_limit is None else memory_limit
+
+        call = _Call((code, _globals, _locals, filename, timeout, memory_limit), timeout)
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new evaluations after shutdown")
+
+            self._pending.append(call)
+            self._outstanding.add(call.future)
+
+        self._dispatch()
+
+        return call.future
+
+    def eval(
+        self,
+        code: str,
+        _globals: Optional[Dict[str, Any]] = None,
+        _locals: Optional[Dict[str, Any]] = None,
+        *,
+        filename: str = "<eval>",
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+    ) -> Any:
+        return self.submit(
+            code,
+            _globals,
+            _locals,
+            filename=filename,
+            timeout=timeout,
+            memory_limit=memory_limit,
+        ).result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._shutdown = True
+
+            # without waiting, evaluations that haven't started yet are cancelled
+            if not wait:
+                for call in self._pending:
+                    call.future.cancel()
+
+            outstanding = [*self._outstanding]
+
+        if wait:
+            wait_futures(outstanding)
+
+        with self._lock:
+            workers = [*self._workers, *self._retired]
+
+        for worker in workers:
+            worker.shutdown(wait=wait)
+
+    def __enter__(self) -> "ProcessPoolEvaluator":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.shutdown()
+
+
+__all__ = [
+    "ProcessPoolEvaluator",
+]
@@ -0,0 +1,209 @@
+import asyncio
+import bisect
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class Lane(IntEnum):
+    CONDITION = 0
+    EXPRESSION = 1
+    CONSOLE = 2
+
+
+class SchedulerOverloaded(RuntimeError):
+    pass
+
+
+class SchedulerMetrics(NamedTuple):
+    submitted: int
+    completed: int
+    deduplicated: int
+    rejected: int
+    running: int
+    queued: Dict[Lane, int]
+    max_queued: int
+    wait_time: float
+
+
+def _current_loop() -> Hashable:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return threading.get_ident()
+
+
+class _Job:
+    __slots__ = ("client", "future", "lane", "loop", "seq")
+
+    def __init__(self, lane: Lane, seq: int, client: Hashable, loop: Hashable) -> None:
+        self.lane = lane
+        self.seq = seq
+        self.client = client
+        self.loop = loop
+        self.future: "Future[Any]" = Future()
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.lane, self.seq) < (other.lane, other.seq)
+
+
+class EvaluationScheduler:
+    def __init__(self, max_concurrency: int = 1, per_client_limit: int = 1, max_queue: int = 64) -> None:
+        self.max_concurrency = max_concurrency
+        self.per_client_limit = per_client_limit
+        self.max_queue = max_queue
+
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._seq = itertools.count()
+
+        self._queue: List[_Job] = []
+        self._inflight: Dict[Hashable, "Future[Any]"] = {}
+        # limits are accounted per loop, evaluations against independent loops never wait for each other
+        self._running: Dict[Hashable, int] = {}
+        self._client_running: Dict[Tuple[Hashable, Hashable], int] = {}
+
+        self._submitted = 0
+        self._completed = 0
+        self._deduplicated = 0
+        self._rejected = 0
+        self._max_queued = 0
+        self._wait_time = 0.0
+
+    def metrics(self) -> SchedulerMetrics:
+        with self._cond:
+            queued = dict.fromkeys(Lane, 0)
+            for job in self._queue:
+                queued[job.lane] += 1
+
+            return SchedulerMetrics(
+                submitted=self._submitted,
+                completed=self._completed,
+                deduplicated=self._deduplicated,
+                rejected=self._rejected,
+                running=sum(self._running.values()),
+                queued=queued,
+                max_queued=self._max_queued,
+                wait_time=self._wait_time,
+            )
+
+    def _next_job(self, loop: Hashable) -> Optional[_Job]:
+        if self._running.get(loop, 0) >= self.max_concurrency:
+            return None
+
+        for job in self._queue:
+            if job.loop == loop and self._client_running.get((loop, job.client), 0) < self.per_client_limit:
+                return job
+
+        return None
+
+    def _enqueue(self, lane: Lane, client: Hashable, loop: Hashable) -> _Job:
+        job = _Job(lane, next(self._seq), client, loop)
+
+        # conditions are never queued: they must not wait behind console commands or be rejected because of them,
+        # and they may be triggered from a thread the running console command itself waits on
+        if lane is not Lane.CONDITION:
+            if len(self._queue) >= self.max_queue:
+                self._rejected += 1
+                raise SchedulerOverloaded(f"Evaluation queue is full ({self.max_queue} pending evaluations)")
+
+            bisect.insort(self._queue, job)
+            self._max_queued = max(self._max_queued, len(self._queue))
+
+        self._submitted += 1
+
+        return job
+
+    def _start(self, job: _Job) -> None:
+        if job.lane is not Lane.CONDITION:
+            start = time.perf_counter()
+            while self._next_job(job.loop) is not job:
+                self._cond.wait()
+
+            self._queue.remove(job)
+            self._wait_time += time.perf_counter() - start
+
+        self._running[job.loop] = self._running.get(job.loop, 0) + 1
+        self._client_running[job.loop, job.client] = self._client_running.get((job.loop, job.client), 0) + 1
+
+    @staticmethod
+    def _release(counters: Dict[Any, int], key: Hashable) -> None:
+        counters[key] -= 1
+        if not counters[key]:
+            del counters[key]
+
+    def _finish(self, job: _Job, key: Optional[Hashable]) -> None:
+        with self._cond:
+            self._completed += 1
+
+            self._release(self._running, job.loop)
+            self._release(self._client_running, (job.loop, job.client))
+
+            if key is not None and self._inflight.get(key) is job.future:
+                del self._inflight[key]
+
+            self._cond.notify_all()
+
+    def run(
+        self,
+        func: Callable[[], T],
+        *,
+        lane: Lane = Lane.CONSOLE,
+        client: Optional[Hashable] = None,
+        loop: Optional[Hashable] = None,
+        key: Optional[Hashable] = None,
+    ) -> T:
+        # evaluation triggered from inside running evaluation (e.g. breakpoint condition)
+        if getattr(self._local, "running", False):
+            return func()
+
+        if loop is None:
+            loop = _current_loop()
+
+        with self._cond:
+            inflight = self._inflight.get(key) if key is not None else None
+
+            if inflight is None:
+                job = self._enqueue(lane, client, loop)
+
+                if key is not None:
+                    self._inflight[key] = job.future
+
+                try:
+                    self._start(job)
+                except BaseException:  # pragma: no cover
+                    self._queue.remove(job)
+                    self._inflight.pop(key, None)
+                    job.future.cancel()
+                    raise
+            else:
+                self._deduplicated += 1
+
+        if inflight is not None:
+            return inflight.result()  # type: ignore
+
+        self._local.running = True
+        try:
+            result = func()
+        except BaseException as exc:
+            job.future.set_exception(exc)
+            raise
+        else:
+            job.future.set_result(result)
+            return result
+        finally:
+            self._local.running = False
+            self._finish(job, key)
+
+
+__all__ = [
+    "EvaluationScheduler",
+    "Lane",
+    "SchedulerMetrics",
+    "SchedulerOverloaded",
+]
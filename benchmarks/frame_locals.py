@@ -0,0 +1,41 @@
+# python -m benchmarks.frame_locals
+import asyncio
+import platform
+import timeit
+from typing import Any, Callable, Generator
+
+from async_eval.async_eval import _save_locals, async_eval_in_frame, save_locals
+
+NUMBER = 10_000
+
+
+def _paused() -> Generator[None, None, None]:
+    a = 0  # noqa: F841
+    yield
+    yield
+
+
+def _bench(func: Callable[[], Any]) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+async def main() -> None:
+    g = _paused()
+    next(g)
+    frame = g.gi_frame
+
+    def write_back() -> None:
+        frame.f_locals["a"] = 1
+        save_locals(frame)
+
+    def evaluate() -> None:
+        async_eval_in_frame("a = 1", frame, validate=False)
+
+    print(f"python {platform.python_version()} ({platform.python_implementation()})")
+    print(f"  strategy:   {_save_locals.__module__}.{_save_locals.__qualname__}")
+    print(f"  write-back: {_bench(write_back):8.3f} us")
+    print(f"  evaluate:   {_bench(evaluate):8.3f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,17 +1,29 @@
 import contextvars
 import platform
+import sys
 import textwrap
+import traceback
 from concurrent.futures import ThreadPoolExecutor
 from typing import ClassVar
 
 from pytest import fixture, mark, raises
 
-from async_eval.async_eval import async_eval, is_async_code
+from async_eval.async_eval import (
+    _noop,
+    _select_save_locals,
+    _user_traceback,
+    async_eval,
+    async_eval_in_frame,
+    find_unresolved_names,
+    is_async_code,
+    validate_code,
+)
 
 from .utils import (  # noqa  # isort:skip
     MyException,
     ctxmanager,
     generator,
+    paused_frame,
     raise_exc,
     regular,
 )
@@ -19,6 +31,8 @@ from .utils import (  # noqa  # isort:skip
 
 IS_PYPY = platform.python_implementation().lower() == "pypy"
 
+counter = 0
+
 
 @mark.parametrize(
     "expr",
@@ -106,6 +120,127 @@ def test_is_not_async_code(expr):
     assert not is_async_code(expr)
 
 
+@mark.parametrize(
+    ("expr", "names"),
+    [
+        ("a", ["a"]),
+        ("a + b + a", ["a", "b"]),
+        ("len(a)", ["a"]),
+        ("known + 1", []),
+        ("local_var", []),
+        ("a = 1\na", []),
+        ("b = a", ["a"]),
+        ("import os\nos.path", []),
+        ("import os.path\nos.path", []),
+        ("from os import path as p\np", []),
+        ("def foo(x=a): return x + b\nfoo()", ["a"]),
+        ("@deco\ndef foo() -> ret: pass", ["deco", "ret"]),
+        ("async def foo(): await b", []),
+        ("lambda x: x + b", []),
+        ("lambda x=a: x", ["a"]),
+        ("class Foo(Base):\n    x = a", ["Base", "a"]),
+        ("class Foo:\n    pass\nFoo", []),
+        ("[x for x in a]", ["a"]),
+        ("(y := a) + y", ["a"]),
+        ("try:\n    a\nexcept NameError:\n    b", ["b"]),
+        ("try:\n    a\nfinally:\n    pass", ["a"]),
+        ("try:\n    pass\nexcept Exception as e:\n    e", []),
+        ("global a\na", []),
+        ("del a", []),
+        ("await regular()", []),
+    ],
+)
+def test_find_unresolved_names(expr, names):
+    local_var = 10  # noqa: F841
+
+    assert find_unresolved_names(expr, {"known": 1, "regular": regular}, locals()) == names
+
+
+@mark.skipif(sys.version_info < (3, 10), reason="match statement is available since python 3.10")
+def test_find_unresolved_names_match():
+    code = "match known:\n    case {'x': x, **rest}:\n        x, rest\n    case [*items]:\n        items"
+
+    assert find_unresolved_names(code, {"known": 1}, {}) == []
+
+
+def test_find_unresolved_names_builtins_dict():
+    assert find_unresolved_names("len", {"__builtins__": {}}, {}) == ["len"]
+    assert find_unresolved_names("len", {"__builtins__": {"len": len}}, {}) == []
+
+
+def test_validate_code():
+    validate_code("a", {"a": 1}, {})
+
+    with raises(NameError, match=r"^name 'a' is not defined$"):
+        validate_code("a", {}, {})
+
+    with raises(SyntaxError):
+        validate_code("1 +", {}, {})
+
+
+def test_async_eval_validate_before_loop(mocker):
+    verify = mocker.patch("async_eval.async_eval.verify_async_debug_available")
+
+    with raises(NameError):
+        async_eval("await undefined_name()", {}, {}, validate=True)
+
+    with raises(SyntaxError):
+        async_eval("await", {}, {}, validate=True)
+
+    verify.assert_not_called()
+
+
+def test_async_eval_without_validation():
+    with raises(NameError):
+        async_eval("undefined_name", {}, {})
+
+    assert async_eval("exec('a = 1', globals())\na", {}) == 1
+    assert async_eval("globals()['zz'] = 1\nzz", {}) == 1
+
+
+def test_user_traceback_without_user_frames():
+    try:
+        raise_exc()
+    except MyException as exc:
+        tb = exc.__traceback__
+
+    assert _user_traceback(tb) is tb
+
+
+def test_select_save_locals_pypy(mocker):
+    mocker.patch("async_eval.async_eval.is_pypy", return_value=True)
+
+    assert _select_save_locals() is _noop
+
+
+def test_select_save_locals_write_through(mocker):
+    mocker.patch("async_eval.async_eval._has_write_through_locals", return_value=True)
+
+    assert _select_save_locals() is _noop
+
+
+@mark.skipif(IS_PYPY, reason="PyPy doesn't have a way to update frame locals.")
+@mark.skipif(sys.version_info >= (3, 13), reason="Not needed for python 3.13+ because of PEP 667")
+def test_select_save_locals_ctypes(mocker):
+    mocker.patch.dict(sys.modules, {"_pydevd_bundle.pydevd_save_locals": None})
+
+    save_locals = _select_save_locals()
+
+    def _with_locals():
+        a = 1
+        yield
+        yield a
+
+    g = _with_locals()
+    next(g)
+
+    f_locals = g.gi_frame.f_locals
+    f_locals["a"] = 2
+    save_locals(g.gi_frame)
+
+    assert next(g) == 2
+
+
 ctx_var = contextvars.ContextVar("ctx_var")
 
 
@@ -168,10 +303,85 @@ class _ExecAsyncCodeSuite:
         async_eval(expr)
         assert a == result
 
+    @mark.skipif(
+        IS_PYPY,
+        reason="PyPy doesn't have a way to update frame locals.",
+    )
+    async def test_async_eval_in_frame(self):
+        a = None
+
+        assert async_eval_in_frame("a = await regular()\na * 2", sys._getframe()) == 20
+        assert a == 10
+
+    @mark.skipif(
+        IS_PYPY,
+        reason="PyPy doesn't have a way to update frame locals.",
+    )
+    async def test_async_eval_in_frame_dont_leak_internal_vars(self):
+        _, frame = paused_frame()
+
+        async_eval_in_frame("a = 1", frame)
+
+        assert {*frame.f_locals} == {"client", "coro_func", "number", "a"}
+
+    async def test_async_eval_in_frame_read_locals(self):
+        client = regular  # noqa: F841
+
+        assert async_eval_in_frame("await client()", sys._getframe()) == 10
+
+    async def test_async_eval_in_frame_update_locals(self):
+        number = 1
+
+        assert async_eval_in_frame("number = number + await regular()\nnumber", sys._getframe()) == 11
+        assert number == 11
+
+    async def test_async_eval_in_frame_global(self):
+        counter = "local"  # noqa: F841
+
+        try:
+            async_eval_in_frame("global counter\ncounter = await regular()", sys._getframe())
+
+            assert globals()["counter"] == 10
+        finally:
+            globals()["counter"] = 0
+
+    async def test_async_eval_in_frame_def_globals(self):
+        client = regular  # noqa: F841
+        frame = sys._getframe()
+
+        func = async_eval_in_frame("async def func():\n    return await client()\nfunc", frame)
+
+        assert func.__globals__ is frame.f_globals
+        assert await func() == 10
+
+    async def test_async_eval_in_frame_syntax_error(self):
+        with raises(SyntaxError):
+            async_eval_in_frame("await", sys._getframe())
+
+    async def test_async_eval_in_frame_raise_exc(self):
+        with raises(MyException) as exc_info:
+            async_eval_in_frame("await raise_exc()", sys._getframe())
+
+        names = [frame.name for frame in traceback.extract_tb(exc_info.value.__traceback__)]
+        assert names[1:] == ["async_eval_in_frame", "__func_wrapper__", "raise_exc"]
+
     async def test_eval_raise_exc(self):
         with raises(MyException):
             async_eval("await raise_exc()")
 
+    async def test_eval_raise_exc_traceback(self):
+        with raises(MyException) as exc_info:
+            async_eval("await raise_exc()")
+
+        names = [frame.name for frame in traceback.extract_tb(exc_info.value.__traceback__)]
+        assert names[1:] == ["async_eval", "__func_wrapper__", "raise_exc"]
+
+    async def test_eval_raise_exc_dont_reflect_context(self):
+        with raises(ZeroDivisionError):
+            async_eval("ctx_var.set(10)\n1 / 0")
+
+        assert ctx_var.get() == 0
+
     async def test_async_eval_dont_leak_internal_vars(self, mocker):
         _globals = {}
         _locals = {}
@@ -0,0 +1,206 @@
+from pytest import fixture, mark, raises, warns
+
+from async_eval.async_eval import async_eval, get_audit_hook, set_audit_hook
+from async_eval.audit import NOT_REPLAYABLE, AuditLog, load_events, main, replay
+
+from .utils import regular  # noqa
+
+
+@fixture
+def log():
+    with AuditLog() as log:
+        yield log
+
+
+def test_audit_log(log):
+    assert async_eval("await regular()") == 10
+
+    (event,) = log.events
+
+    assert event["code"] == "await regular()"
+    assert event["filename"] == "<eval>"
+    assert len(event["code_hash"]) == 16
+    assert event["outcome"] == "ok"
+    assert event["error"] is None
+    assert event["phase"] is None
+    assert event["loop_iterations"] is None
+    assert set(event["timings"]) == {"validate", "transform", "compile", "run", "total"}
+    assert event["timings"]["total"] >= event["timings"]["run"] > 0
+
+
+@mark.asyncio
+async def test_audit_log_running_loop(log):
+    async_eval("import asyncio\nawait asyncio.sleep(0)")
+
+    (event,) = log.events
+
+    assert event["loop_iterations"] >= 2
+
+
+def test_audit_log_error(log):
+    with raises(ZeroDivisionError):
+        async_eval("1 / 0")
+
+    with raises(SyntaxError):
+        async_eval("1 +")
+
+    run_error, transform_error = log.events
+
+    assert run_error["outcome"] == "error"
+    assert run_error["error"] == "ZeroDivisionError"
+    assert run_error["phase"] == "run"
+    assert run_error["timings"]["run"] > 0
+
+    assert transform_error["error"] == "SyntaxError"
+    assert transform_error["phase"] == "transform"
+    assert transform_error["timings"]["transform"] > 0
+    assert transform_error["timings"]["run"] == 0
+
+
+def test_audit_log_validate_error(log):
+    with raises(NameError):
+        async_eval("await undefined_name()", validate=True)
+
+    (event,) = log.events
+
+    assert event["outcome"] == "error"
+    assert event["error"] == "NameError"
+    assert event["phase"] == "validate"
+    assert event["timings"]["validate"] > 0
+    assert event["timings"]["transform"] == event["timings"]["run"] == 0
+
+
+def test_audit_log_ring_buffer():
+    with AuditLog(maxlen=2) as log:
+        for i in range(3):
+            async_eval(str(i))
+
+    assert [event["code"] for event in log.events] == ["1", "2"]
+
+
+def test_audit_log_uninstall(log):
+    assert get_audit_hook() == log.record
+
+    other = AuditLog().install()
+    log.uninstall()
+
+    assert get_audit_hook() == other.record
+
+    other.uninstall()
+
+    assert get_audit_hook() is None
+
+
+def test_audit_log_sink(tmp_path):
+    path = tmp_path / "audit.jsonl"
+
+    with AuditLog(path=path) as log:
+        async_eval("10")
+        async_eval("await regular()")
+
+    assert load_events(path) == [*log.events]
+
+
+def test_replay(log):
+    async_eval("a = 10\na * 2")
+
+    events = replay(log.events, repeat=2)
+
+    assert [event["code"] for event in events] == ["a = 10\na * 2"] * 2
+    assert [event["outcome"] for event in events] == ["ok"] * 2
+    assert len(log.events) == 1
+
+
+def test_replay_globals(log):
+    async_eval("await regular()")
+
+    assert replay(log.events)[0]["outcome"] == NOT_REPLAYABLE
+    assert replay(log.events, {"regular": regular})[0]["outcome"] == "ok"
+
+
+def test_replay_validate_error(log):
+    with raises(NameError):
+        async_eval("undefined_name", validate=True)
+
+    (event,) = replay(log.events)
+
+    assert event["outcome"] == "error"
+    assert event["phase"] == "validate"
+
+
+def test_replay_restore_hook():
+    hook = get_audit_hook()
+    replay([])
+
+    assert get_audit_hook() is hook
+
+
+def test_replay_not_started(mocker, log):
+    async_eval("10")
+
+    mocker.patch("async_eval.async_eval.verify_async_debug_available", side_effect=RuntimeError)
+
+    (event,) = replay(log.events)
+
+    assert event["outcome"] == NOT_REPLAYABLE
+    assert event["error"] == "RuntimeError"
+    assert event["phase"] == "validate"
+    assert event["timings"]["run"] == 0
+
+
+def test_main(tmp_path, capsys):
+    path = tmp_path / "audit.jsonl"
+
+    with AuditLog(path=path):
+        async_eval("10")
+
+    main([str(path), "--repeat", "3"])
+
+    header, line = capsys.readouterr().out.splitlines()
+
+    assert header.split() == ["code", "hash", "recorded", "ms", "replay", "ms", "outcome"]
+    assert line.split()[0] == load_events(path)[0]["code_hash"]
+    assert line.split()[-1] == "ok"
+
+
+def test_main_not_replayable(tmp_path, capsys):
+    path = tmp_path / "audit.jsonl"
+
+    with AuditLog(path=path):
+        async_eval("await regular()")
+
+    main([str(path)])
+
+    _, line = capsys.readouterr().out.splitlines()
+
+    assert line.split()[-2:] == ["-", NOT_REPLAYABLE]
+
+
+def test_audit_hook_failure():
+    def _hook(_):
+        raise OSError("No space left on device")
+
+    set_audit_hook(_hook)
+
+    try:
+        with warns(RuntimeWarning, match="No space left on device"):
+            assert async_eval("10") == 10
+
+        with warns(RuntimeWarning), raises(ZeroDivisionError):
+            async_eval("1 / 0")
+    finally:
+        set_audit_hook(None)
+
+
+def test_set_audit_hook():
+    events = []
+    set_audit_hook(events.append)
+
+    try:
+        async_eval("10")
+    finally:
+        set_audit_hook(None)
+
+    async_eval("10")
+
+    assert len(events) == 1
@@ -0,0 +1,199 @@
+import os
+
+from pytest import fixture
+
+from async_eval.async_eval import _transform_to_async, async_eval
+from async_eval.cache import DiskCodeCache, default_cache_dir, disable_disk_cache, enable_disk_cache
+
+
+@fixture
+def cache(tmp_path):
+    return DiskCodeCache(tmp_path)
+
+
+def test_default_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+    assert default_cache_dir() == tmp_path / "async_eval"
+
+
+def test_get_set(cache):
+    code = compile("a = 10", "<test>", "exec")
+
+    assert cache.get("a = 10", "<test>") is None
+
+    cache.set("a = 10", "<test>", code)
+
+    assert cache.get("a = 10", "<test>") == code
+    assert cache.get(b"a = 10", "<test>") == code
+    assert cache.get("a = 10", "<other>") is None
+    assert cache.get("a = 20", "<test>") is None
+
+
+def test_salt(tmp_path, cache):
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    assert DiskCodeCache(tmp_path, salt="v2").get("a = 10", "<test>") is None
+
+
+def test_corrupted_entry(cache):
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    (path,) = cache.directory.glob("*.bin")
+    path.write_bytes(b"corrupted")
+
+    assert DiskCodeCache(cache.directory).get("a = 10", "<test>") is None
+
+
+def test_not_code_entry(cache):
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    (path,) = cache.directory.glob("*.bin")
+    path.write_bytes(b"N")
+
+    assert DiskCodeCache(cache.directory).get("a = 10", "<test>") is None
+
+
+def test_atomic_write(cache):
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    assert [p.suffix for p in cache.directory.iterdir()] == [".bin"]
+
+
+def test_failed_write(mocker, cache):
+    mocker.patch("async_eval.cache.os.replace", side_effect=OSError)
+
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    assert not [*cache.directory.iterdir()]
+
+
+def test_evict(cache):
+    cache.max_size = 0
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    assert cache.get("a = 10", "<test>") is None
+
+
+def test_evict_oldest(cache):
+    sources = [f"a = {i}" for i in range(3)]
+
+    for i, source in enumerate(sources):
+        cache.set(source, "<test>", compile(source, "<test>", "exec"))
+        os.utime(cache._path(cache._key(source, "<test>")), (i, i))
+
+    cache.max_size = sum(p.stat().st_size for p in cache.directory.glob("*.bin")) - 1
+    cache.evict()
+
+    assert cache.get(sources[0], "<test>") is None
+    assert cache.get(sources[1], "<test>") is not None
+    assert cache.get(sources[2], "<test>") is not None
+
+
+def test_clear(cache):
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+    cache.clear()
+
+    assert not [*cache.directory.iterdir()]
+    assert cache.get("a = 10", "<test>") is None
+
+
+def test_memory_hit(mocker, cache):
+    code = compile("a = 10", "<test>", "exec")
+    cache.set("a = 10", "<test>", code)
+
+    utime = mocker.patch("async_eval.cache.os.utime")
+    for path in cache.directory.glob("*.bin"):
+        path.unlink()
+
+    assert cache.get("a = 10", "<test>") is code
+    utime.assert_not_called()
+
+
+def test_memory_hit_refresh_mtime(mocker, cache):
+    cache.touch_interval = 0
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    utime = mocker.patch("async_eval.cache.os.utime")
+
+    assert cache.get("a = 10", "<test>") is not None
+    utime.assert_called_once_with(cache._path(cache._key("a = 10", "<test>")))
+
+
+def test_evict_keeps_memory_hits(cache):
+    cache.touch_interval = 0
+    sources = [f"a = {i}" for i in range(3)]
+
+    for i, source in enumerate(sources):
+        cache.set(source, "<test>", compile(source, "<test>", "exec"))
+        os.utime(cache._path(cache._key(source, "<test>")), (i, i))
+
+    assert cache.get(sources[0], "<test>") is not None
+
+    cache.max_size = sum(p.stat().st_size for p in cache.directory.glob("*.bin")) - 1
+    cache.evict()
+
+    assert [*cache._memory] == [cache._key(source, "<test>") for source in (sources[2], sources[0])]
+
+
+def test_set_rewrite_size(cache):
+    code = compile("a = 10", "<test>", "exec")
+
+    for _ in range(3):
+        cache.set("a = 10", "<test>", code)
+
+    assert cache._size == cache._directory_size()
+
+
+def test_memory_load_from_disk(cache):
+    cache.set("a = 10", "<test>", compile("a = 10", "<test>", "exec"))
+
+    other = DiskCodeCache(cache.directory)
+    code = other.get("a = 10", "<test>")
+
+    assert code is not None
+
+    (path,) = cache.directory.glob("*.bin")
+    path.unlink()
+
+    assert other.get("a = 10", "<test>") is code
+
+
+def test_memory_size(cache):
+    cache.memory_size = 2
+
+    for i in range(3):
+        cache.set(f"a = {i}", "<test>", compile(f"a = {i}", "<test>", "exec"))
+
+    assert [*cache._memory] == [cache._key(f"a = {i}", "<test>") for i in (1, 2)]
+
+
+def test_evict_only_over_max_size(mocker, cache):
+    evict = mocker.spy(cache, "evict")
+    glob = mocker.spy(type(cache.directory), "glob")
+
+    for i in range(3):
+        cache.set(f"a = {i}", "<test>", compile(f"a = {i}", "<test>", "exec"))
+
+    evict.assert_not_called()
+    assert glob.call_count == 1
+
+    cache.max_size = cache._size
+    cache.set("a = 3", "<test>", compile("a = 3", "<test>", "exec"))
+
+    evict.assert_called_once()
+    assert cache._size <= cache.max_size
+
+
+def test_enable_disk_cache(mocker, tmp_path):
+    transform = mocker.patch("async_eval.async_eval._transform_to_async", side_effect=_transform_to_async)
+
+    cache = enable_disk_cache(tmp_path)
+    try:
+        assert async_eval("10", {}, {}) == 10
+        assert async_eval("10", {}, {}) == 10
+    finally:
+        disable_disk_cache()
+
+    assert transform.call_count == 1
+    assert cache.get("10", "<eval>") is not None
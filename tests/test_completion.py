@@ -0,0 +1,270 @@
+import gc
+import weakref
+from functools import partial, wraps
+
+from pytest import fixture, mark
+
+from async_eval.async_eval import _save_locals_hooks, save_locals
+from async_eval.completion import Completion, CompletionService, is_async_callable, is_awaitable
+
+from .utils import generator, paused_frame, regular  # noqa
+
+
+class Client:
+    value = 10
+
+    async def fetch(self) -> int:
+        return self.value
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    async def create() -> "Client":
+        return Client()
+
+
+class Proxy:
+    def __init__(self) -> None:
+        self.calls = []
+
+    def __getattr__(self, name: str) -> "Proxy":
+        self.calls.append(name)
+        return Proxy()
+
+    def __call__(self, *args, **kwargs) -> "Proxy":
+        return Proxy()
+
+
+class Service:
+    __slots__ = ("slot",)
+
+    @property
+    def conn(self) -> Client:
+        return Client()
+
+
+class AsyncCallable:
+    async def __call__(self) -> None:
+        pass
+
+
+def decorator(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@decorator
+async def decorated() -> None:
+    pass
+
+
+async def get_client() -> Client:
+    return Client()
+
+
+get_client_calls = []
+
+
+async def get_client_counted() -> Client:
+    get_client_calls.append(1)
+    return Client()
+
+
+@fixture
+def frame():
+    g, frame = paused_frame(globals(), client=Client())
+    yield frame
+    del g
+
+
+@fixture
+def service():
+    with CompletionService() as service:
+        yield service
+
+
+@mark.parametrize(
+    ("obj", "result"),
+    [
+        (regular, True),
+        (generator, True),
+        (Client.create, True),
+        (Client().fetch, True),
+        (AsyncCallable(), True),
+        (decorated, True),
+        (partial(regular), True),
+        (Client.close, False),
+        (Client, False),
+        (AsyncCallable, False),
+        (10, False),
+    ],
+    ids=[
+        "coroutine-function",
+        "async-generator-function",
+        "static-method",
+        "bound-method",
+        "async-callable",
+        "decorated",
+        "partial",
+        "function",
+        "class",
+        "class-with-async-call",
+        "literal",
+    ],
+)
+def test_is_async_callable(obj, result):
+    assert is_async_callable(obj) == result
+
+
+def test_is_awaitable():
+    coro = regular()
+
+    try:
+        assert is_awaitable(coro)
+        assert is_awaitable(regular)
+        assert not is_awaitable(10)
+    finally:
+        coro.close()
+
+
+@mark.parametrize(
+    ("text", "result"),
+    [
+        ("cli", [Completion("client", "Client", False)]),
+        ("x = coro_", [Completion("coro_func", "function", True)]),
+        ("client.value + numb", [Completion("number", "int", False)]),
+        ("await client.f", [Completion("fetch", "function", True)]),
+        ("client.clo", [Completion("close", "function", False)]),
+        ("Client.cre", [Completion("create", "staticmethod", True)]),
+        ("client . va", [Completion("value", "int", False)]),
+        ("client.value.rea", [Completion("real", "getset_descriptor", False)]),
+        ("client.missing.value.rea", []),
+        ("(await get_client()).va", [Completion("value", "int", False)]),
+        ("(await get_client()).fet", [Completion("fetch", "function", True)]),
+        ("get_client().va", []),
+        ("(get_client()).va", []),
+        ("(client.close()).va", []),
+        ("await client.fetch()).va", []),
+        ("missing.va", []),
+        ("1.va", []),
+        ("(await missing()).va", []),
+        ("unknown", []),
+    ],
+)
+def test_complete(service, frame, text, result):
+    assert service.complete(frame, text) == result
+
+
+def test_names(service, frame):
+    names = service.names(frame)
+
+    assert names["client"] == Completion("client", "Client", False)
+    assert names["regular"] == Completion("regular", "function", True)
+    assert names["len"] == Completion("len", "builtin_function_or_method", False)
+
+
+def test_awaitables(service, frame):
+    assert {"coro_func", "regular", "generator", "get_client", "decorated"} <= {*service.awaitables(frame)}
+    assert "client" not in service.awaitables(frame)
+
+
+def test_cache(service, frame):
+    entry = service._entry(frame)
+
+    assert service._entry(frame) is entry
+
+    save_locals(frame)
+
+    assert service._entry(frame) is not entry
+
+
+def test_cache_attributes(mocker, service, frame):
+    spy = mocker.spy(service, "_resolve")
+
+    service.complete(frame, "client.va")
+    service.complete(frame, "client.fe")
+
+    spy.assert_called_once()
+
+
+def test_cache_maxsize(frame):
+    _, other = paused_frame(globals(), client=Client())
+
+    with CompletionService(maxsize=1) as service:
+        service.complete(frame, "cli")
+        service.complete(other, "cli")
+
+        assert [*service._frames] == [id(other)]
+
+
+def test_close(frame):
+    service = CompletionService()
+    service.complete(frame, "cli")
+
+    assert service.invalidate in _save_locals_hooks
+
+    service.close()
+    service.close()
+
+    assert service.invalidate not in _save_locals_hooks
+    assert not service._frames
+
+
+def test_complete_no_side_effects(service):
+    proxy = Proxy()
+    _, frame = paused_frame(client=proxy)
+
+    assert service.complete(frame, "cli") == [Completion("client", "Proxy", False)]
+    assert service.complete(frame, "client.ca") == [Completion("calls", "list", False)]
+
+    assert not proxy.calls
+
+
+def test_cache_dont_keep_frame_alive(service):
+    g, frame = paused_frame(globals(), client=Client())
+    ref = weakref.ref(frame.f_locals["client"])
+
+    service.complete(frame, "client.va")
+
+    del g, frame
+    gc.collect()
+
+    assert ref() is None
+
+
+def test_complete_evaluate_once(service, frame):
+    get_client_calls.clear()
+    entry = service._entry(frame)
+
+    assert service.complete(frame, "(await get_client_counted()).va") == [Completion("value", "int", False)]
+    assert service.complete(frame, "(await get_client_counted()).fe") == [Completion("fetch", "function", True)]
+
+    assert len(get_client_calls) == 1
+    assert service._entry(frame) is entry
+
+
+def test_complete_custom_evaluate(mocker, frame):
+    evaluate = mocker.Mock(return_value=Client())
+
+    with CompletionService(evaluate=evaluate) as service:
+        assert service.complete(frame, "(await get_client()).va") == [Completion("value", "int", False)]
+
+    evaluate.assert_called_once_with("await get_client()", frame)
+
+
+@mark.parametrize("text", ["client.conn.", "client.conn.f", "client.slot.", "client.conn.fget."])
+def test_complete_data_descriptor(service, text):
+    _, frame = paused_frame(client=Service())
+
+    # value is unknown without running descriptor, so completion is left to fallback
+    assert service.complete(frame, text) == []
+
+
+def test_complete_keywords(service, frame):
+    assert Completion("for", "keyword", False) in service.complete(frame, "fo")
+    assert Completion("from", "keyword", False) in service.complete(frame, "fr")
+    assert service.complete(frame, "cli") == [Completion("client", "Client", False)]
@@ -0,0 +1,150 @@
+import subprocess
+import sys
+import textwrap
+
+from pytest import fixture, raises
+
+from async_eval.__main__ import main, run_script
+
+SCRIPT = textwrap.dedent(
+    """\
+    import asyncio
+    import sys
+
+    async def foo():
+        await asyncio.sleep(0)
+        return 10
+
+    result = await foo()
+    values = [i async for i in (await asyncio.sleep(0, result=aiter_range(3)))]
+    argv = sys.argv[1:]
+    """,
+)
+
+AITER = textwrap.dedent(
+    """\
+    async def aiter_range(n):
+        for i in range(n):
+            yield i
+
+    """,
+)
+
+
+@fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    return cache / "async_eval" / "scripts"
+
+
+@fixture
+def script(tmp_path):
+    path = tmp_path / "script.py"
+    path.write_text(AITER + SCRIPT)
+    return path
+
+
+def test_run_script(script):
+    _globals = run_script(script)
+
+    assert _globals["__name__"] == "__main__"
+    assert _globals["__file__"] == str(script)
+    assert _globals["result"] == 10
+    assert _globals["values"] == [0, 1, 2]
+
+
+def test_run_script_main_module(tmp_path):
+    path = tmp_path / "pickled.py"
+    path.write_text(
+        textwrap.dedent(
+            """\
+            import asyncio
+            import pickle
+            import sys
+            from dataclasses import dataclass
+
+            @dataclass
+            class P:
+                x: int
+
+            main = sys.modules["__main__"]
+            p = pickle.loads(pickle.dumps(await asyncio.sleep(0, result=P(1))))
+            """,
+        ),
+    )
+
+    main_module = sys.modules["__main__"]
+    _globals = run_script(path)
+
+    assert _globals["p"] == _globals["P"](1)
+    assert _globals["main"] is not main_module
+    assert sys.modules["__main__"] is main_module
+
+
+def test_run_script_without_await(tmp_path):
+    path = tmp_path / "sync.py"
+    path.write_text("a = 10")
+
+    assert run_script(path)["a"] == 10
+
+
+def test_run_script_raise_exc(tmp_path):
+    path = tmp_path / "exc.py"
+    path.write_text("import asyncio\nawait asyncio.sleep(0)\n1 / 0")
+
+    with raises(ZeroDivisionError):
+        run_script(path)
+
+
+def test_run_script_cancel_pending_tasks(tmp_path):
+    path = tmp_path / "pending.py"
+    path.write_text("import asyncio\ntask = asyncio.ensure_future(asyncio.sleep(10))\nawait asyncio.sleep(0)")
+
+    assert run_script(path)["task"].cancelled()
+
+
+def test_run_script_cache(mocker, script, cache_dir):
+    run_script(script)
+
+    assert len([*cache_dir.iterdir()]) == 1
+
+    compile_mock = mocker.patch("async_eval.__main__._compile_script")
+    assert run_script(script)["result"] == 10
+    compile_mock.assert_not_called()
+
+    script.write_text(AITER + SCRIPT + "\nresult = 20")
+    mocker.stop(compile_mock)
+
+    assert run_script(script)["result"] == 20
+    assert len([*cache_dir.iterdir()]) == 2
+
+
+def test_run_script_no_cache(script, cache_dir):
+    run_script(script, use_cache=False)
+
+    assert not cache_dir.exists()
+
+
+def test_main(mocker, monkeypatch, script):
+    monkeypatch.setattr(sys, "argv", [*sys.argv])
+    monkeypatch.setattr(sys, "path", [*sys.path])
+
+    run_mock = mocker.patch("async_eval.__main__.run_script")
+
+    main(["--no-cache", str(script), "a", "--b"])
+
+    run_mock.assert_called_once_with(str(script), use_cache=False)
+    assert sys.argv == [str(script), "a", "--b"]
+    assert sys.path[0] == str(script.parent)
+
+
+def test_main_module(script):
+    script.write_text(AITER + SCRIPT + "\nprint(result, values, argv)")
+
+    out = subprocess.check_output(  # noqa: S603
+        [sys.executable, "-m", "async_eval", str(script), "a", "b"],
+        text=True,
+    )
+
+    assert out == "10 [0, 1, 2] ['a', 'b']\n"
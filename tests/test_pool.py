@@ -0,0 +1,275 @@
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+
+from pytest import fixture, mark, raises
+
+from async_eval import pool
+from async_eval.async_eval import _cancel_pending_tasks
+from async_eval.pool import ProcessPoolEvaluator, _Deadline, _evaluate, _memory_limit, _time_limit
+
+_STUBBORN_TASK = """
+import asyncio
+
+async def stubborn():
+    while True:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            pass
+
+asyncio.ensure_future(stubborn())
+await asyncio.sleep(0)
+"""
+
+
+@fixture(scope="module")
+def evaluator():
+    with ProcessPoolEvaluator(max_workers=2) as pool:
+        yield pool
+
+
+@mark.parametrize(
+    ("expr", "result"),
+    [
+        ("10", 10),
+        ("a + b", 3),
+        ("import asyncio\nawait asyncio.sleep(0)\na * 10", 10),
+        ("[i async for i in gen()]", [*range(3)]),
+    ],
+    ids=[
+        "literal",
+        "globals",
+        "await",
+        "async-comprehension",
+    ],
+)
+def test_pool_eval(evaluator, expr, result):
+    code = "async def gen():\n    for i in range(3):\n        yield i\n" + expr
+
+    assert evaluator.eval(code, {"a": 1, "b": 2}) == result
+
+
+def test_pool_eval_drops_builtins(evaluator):
+    assert evaluator.eval("len(a)", {"__builtins__": __builtins__, "a": [1, 2]}) == 2
+
+
+def test_pool_eval_raise_exc(evaluator):
+    with raises(ZeroDivisionError):
+        evaluator.eval("1 / 0")
+
+
+def test_pool_eval_raise_exc_traceback(evaluator):
+    with raises(ZeroDivisionError) as exc_info:
+        evaluator.eval("1 / 0")
+
+    assert "__async_func__" not in str(exc_info.value.__cause__)
+
+
+def test_pool_submit(evaluator):
+    futures = [evaluator.submit("await __import__('asyncio').sleep(0) or i", {"i": i}) for i in range(10)]
+
+    assert [fut.result() for fut in futures] == [*range(10)]
+
+
+@mark.skipif(sys.platform == "win32", reason="No SIGALRM on Windows")
+@mark.parametrize(
+    "expr",
+    [
+        "await __import__('asyncio').sleep(10)",
+        "while True:\n    pass",
+        "while True:\n    try:\n        while True:\n            pass\n    except Exception:\n        pass",
+    ],
+    ids=[
+        "async",
+        "cpu-bound",
+        "swallowed",
+    ],
+)
+def test_pool_eval_timeout(evaluator, expr):
+    with raises(TimeoutError):
+        evaluator.eval(expr, timeout=0.1)
+
+    assert evaluator.eval("10") == 10
+
+
+@mark.skipif(sys.platform == "win32", reason="No resource module on Windows")
+def test_pool_eval_memory_limit(evaluator):
+    with raises(MemoryError):
+        evaluator.eval("bytearray(1024 ** 3)", memory_limit=512 * 1024**2)
+
+    assert len(evaluator.eval("bytearray(1024 ** 2)", memory_limit=512 * 1024**2)) == 1024**2
+
+
+@mark.skipif(sys.platform == "win32", reason="No SIGALRM on Windows")
+def test_pool_eval_timeout_kill(evaluator, mocker):
+    mocker.patch.object(pool, "KILL_GRACE", 0.1)
+
+    # worker can't interrupt itself, so parent kills it and spawns new one
+    with raises(TimeoutError):
+        evaluator.eval(
+            "import signal\nsignal.signal(signal.SIGALRM, signal.SIG_IGN)\nwhile True:\n    pass", timeout=0.1
+        )
+
+    assert [fut.result() for fut in [evaluator.submit("10") for _ in range(4)]] == [10] * 4
+
+
+def test_pool_eval_worker_crash(evaluator):
+    with raises(BrokenProcessPool):
+        evaluator.eval("__import__('os')._exit(1)")
+
+    assert [fut.result() for fut in [evaluator.submit("10") for _ in range(4)]] == [10] * 4
+
+
+@mark.skipif(sys.platform == "win32", reason="No SIGKILL on Windows")
+def test_pool_idle_worker_killed():
+    with ProcessPoolEvaluator(max_workers=1) as evaluator:
+        [worker] = evaluator._workers
+        os.kill(worker.pid.result(), signal.SIGKILL)
+
+        deadline = time.monotonic() + 5
+        while not worker.executor._broken:
+            assert time.monotonic() < deadline, "timeout"
+            time.sleep(0.01)
+
+        assert evaluator.eval("10") == 10
+        assert evaluator._retired == [worker]
+        assert len(evaluator._idle) == 1
+
+
+def test_pool_eval_stubborn_task(evaluator):
+    assert evaluator.eval(_STUBBORN_TASK + "10") == 10
+    assert evaluator.eval("len(__import__('asyncio').all_tasks())") == 1
+
+
+def test_pool_cancel_pending():
+    with ProcessPoolEvaluator(max_workers=1) as evaluator:
+        running = evaluator.submit("await __import__('asyncio').sleep(0.5) or 10")
+        pending = evaluator.submit("20")
+
+        assert pending.cancel()
+        assert running.result() == 10
+
+
+def test_pool_shutdown():
+    evaluator = ProcessPoolEvaluator(max_workers=1, prewarm=False)
+    futures = [evaluator.submit("i", {"i": i}) for i in range(3)]
+
+    evaluator.shutdown()
+
+    assert all(fut.done() for fut in futures)
+
+    with raises(RuntimeError):
+        evaluator.submit("10")
+
+
+@mark.skipif(sys.version_info < (3, 9), reason="ProcessPoolExecutor.shutdown(wait=False) is broken on python 3.8")
+def test_pool_shutdown_nowait():
+    evaluator = ProcessPoolEvaluator(max_workers=1)
+
+    running = evaluator.submit("await __import__('asyncio').sleep(0.2) or 10")
+    pending = evaluator.submit("20")
+
+    evaluator.shutdown(wait=False)
+
+    assert pending.cancelled()
+    assert running.result() == 10
+
+
+@fixture
+def worker_loop(mocker):
+    mocker.patch.object(pool, "_loop", None)
+    yield
+    pool._loop.close()
+    asyncio.set_event_loop(None)
+
+
+@mark.usefixtures("worker_loop")
+def test_evaluate():
+    assert _evaluate("await __import__('asyncio').sleep(0) or a", {"a": 10}, {}, "<eval>", None, None) == 10
+
+
+@mark.usefixtures("worker_loop")
+def test_evaluate_raise_exc():
+    with raises(ZeroDivisionError) as exc_info:
+        _evaluate("1 / 0", {}, {}, "<eval>", None, None)
+
+    assert exc_info.traceback[-1].frame.code.name == "__func_wrapper__"
+
+
+@mark.usefixtures("worker_loop")
+def test_evaluate_stubborn_task():
+    assert _evaluate("10", {}, {}, "<eval>", None, None) == 10
+
+    loop = pool._loop
+    assert _evaluate(_STUBBORN_TASK + "10", {}, {}, "<eval>", None, None) == 10
+
+    # loop with task ignoring cancellation is replaced
+    assert loop.is_closed()
+    assert pool._loop is not loop
+
+
+@mark.skipif(sys.platform == "win32", reason="No SIGALRM on Windows")
+@mark.usefixtures("worker_loop")
+def test_evaluate_timeout():
+    with raises(TimeoutError):
+        _evaluate("await __import__('asyncio').sleep(10)", {}, {}, "<eval>", 0.05, None)
+
+    assert signal.getsignal(signal.SIGALRM) is signal.SIG_DFL
+
+
+def _swallow_exceptions():
+    while True:
+        with suppress(Exception):
+            while True:
+                pass
+
+
+@mark.skipif(sys.platform == "win32", reason="No SIGALRM on Windows")
+def test_time_limit():
+    with raises(_Deadline), _time_limit(0.05):
+        _swallow_exceptions()
+
+    with _time_limit(None):
+        pass
+
+
+@mark.skipif(sys.platform == "win32", reason="No resource module on Windows")
+def test_memory_limit():
+    import resource
+
+    limit = resource.getrlimit(resource.RLIMIT_AS)
+
+    with _memory_limit(64 * 1024**3):
+        assert resource.getrlimit(resource.RLIMIT_AS)[0] == 64 * 1024**3
+
+    assert resource.getrlimit(resource.RLIMIT_AS) == limit
+
+    with _memory_limit(None):
+        assert resource.getrlimit(resource.RLIMIT_AS) == limit
+
+
+def test_cancel_pending_tasks_timeout():
+    loop = asyncio.new_event_loop()
+    stop = threading.Event()
+
+    async def stubborn():
+        while not stop.is_set():
+            with suppress(asyncio.CancelledError):
+                await asyncio.sleep(10)
+
+    task = loop.create_task(stubborn())
+    loop.run_until_complete(asyncio.sleep(0))
+
+    try:
+        assert _cancel_pending_tasks(loop, 0.05) == {task}
+
+        stop.set()
+        assert _cancel_pending_tasks(loop) == set()
+    finally:
+        loop.close()
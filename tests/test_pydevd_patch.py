@@ -3,11 +3,11 @@ from unittest.mock import MagicMock
 
 from pytest import fixture, mark
 
-from .utils import ctxmanager, regular  # noqa
+from .utils import MyException, ctxmanager, paused_frame, raise_exc, regular  # noqa
 
 
-def _as_async(code: str):
-    return f"__import__('sys').__async_eval__({code!r}, globals(), locals())"
+def _as_async(code: str, hook: str = "__async_eval__"):
+    return f"__import__('sys').{hook}({code!r}, globals(), locals())"
 
 
 @fixture(autouse=True)
@@ -17,18 +17,24 @@ def _clear_modules():
             del sys.modules[name]
 
 
+sync_params = [
+    ("",) * 2,
+    ("foo()",) * 2,
+    (_as_async("await foo()"),) * 2,
+]
+
 params_mark = mark.parametrize(
     ("code", "result"),
     [
-        ("",) * 2,
-        ("foo()",) * 2,
-        (_as_async("await foo()"),) * 2,
+        *sync_params,
         ("await foo()", _as_async("await foo()")),
     ],
 )
 
+sync_params_mark = mark.parametrize(("code", "result"), sync_params)
 
-@params_mark
+
+@sync_params_mark
 def test_evaluate_expression(mocker, code, result):
     mock_eval: MagicMock = mocker.patch("_pydevd_bundle.pydevd_vars.evaluate_expression")
     mock_find_frame: MagicMock = mocker.patch("_pydevd_bundle.pydevd_vars.find_frame")
@@ -39,24 +45,156 @@ def test_evaluate_expression(mocker, code, result):
     thread_id, frame_id = object(), object()
     evaluate_expression(thread_id, frame_id, code, True)
 
-    do_exec = code != "await foo()"
+    mock_eval.assert_called_once_with(thread_id, frame_id, result, True)
+    mock_find_frame.assert_called_once_with(thread_id, frame_id)
+
+
+def test_evaluate_async_expression(mocker):
+    _, frame = paused_frame()
+
+    mock_eval: MagicMock = mocker.patch("_pydevd_bundle.pydevd_vars.evaluate_expression")
+    mock_find_frame: MagicMock = mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
 
-    mock_eval.assert_called_once_with(thread_id, frame_id, result, do_exec)
+    from async_eval.ext.pydevd.code import evaluate_expression
+
+    thread_id, frame_id = object(), object()
+
+    assert evaluate_expression(thread_id, frame_id, "await regular()@LINE@await regular() * 2", True) == 20
+
+    mock_eval.assert_not_called()
     mock_find_frame.assert_called_once_with(thread_id, frame_id)
 
 
-@params_mark
-def test_line_breakpoint(code, result):
+def test_evaluate_async_expression_frame_locals(mocker):
+    _, frame = paused_frame(client=regular)
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+
+    from async_eval.ext.pydevd.code import evaluate_expression
+
+    assert evaluate_expression(object(), object(), "await client()", True) == 10
+
+
+def test_evaluate_async_expression_raise_exc(mocker):
+    _, frame = paused_frame()
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+
+    from _pydevd_bundle.pydevd_xml import ExceptionOnEvaluate
+
+    from async_eval.ext.pydevd.code import evaluate_expression
+
+    result = evaluate_expression(object(), object(), "await raise_exc()", True)
+
+    assert isinstance(result, ExceptionOnEvaluate)
+    assert isinstance(result.result, MyException)
+
+
+def test_evaluate_async_expression_validate(mocker):
+    _, frame = paused_frame()
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+    transform = mocker.patch("async_eval.async_eval._get_async_code")
+
+    from _pydevd_bundle.pydevd_xml import ExceptionOnEvaluate
+
+    from async_eval.ext.pydevd.code import evaluate_expression
+
+    result = evaluate_expression(object(), object(), "await undefined_name()", True)
+
+    assert isinstance(result, ExceptionOnEvaluate)
+    assert isinstance(result.result, NameError)
+
+    transform.assert_not_called()
+
+
+def test_evaluate_async_expression_frame_not_found(mocker):
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=None)
+
+    from async_eval.ext.pydevd.code import evaluate_expression
+
+    assert evaluate_expression(object(), object(), "await regular()", True) is None
+
+
+@mark.parametrize(
+    ("code", "condition", "expression"),
+    [
+        *((code, result, result) for code, result in sync_params),
+        ("await foo()", _as_async("await foo()", "__async_eval_condition__"), _as_async("await foo()")),
+    ],
+)
+def test_line_breakpoint(code, condition, expression):
     from async_eval.ext.pydevd import code as _  # noqa # isort:skip
     from _pydevd_bundle.pydevd_breakpoints import LineBreakpoint
 
     line = LineBreakpoint(line=0, func_name="test", condition=code, expression=code)
 
-    assert line.condition == result
-    assert line.expression == result
+    assert line.condition == condition
+    assert line.expression == expression
 
 
-@params_mark
+def test_async_breakpoint_condition(mocker):
+    from async_eval.ext.pydevd import code
+
+    spy = mocker.spy(code.scheduler, "run")
+
+    _locals = {}
+    condition = _as_async("await regular() == 10", "__async_eval_condition__")
+
+    assert eval(condition, globals(), _locals)  # noqa: S307
+
+    spy.assert_called_once_with(
+        mocker.ANY,
+        lane=code.Lane.CONDITION,
+        client=None,
+        loop=None,
+        key=(id(_locals), "await regular() == 10"),
+    )
+
+
+def test_evaluate_expression_scheduled(mocker):
+    _, frame = paused_frame()
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+
+    from async_eval.ext.pydevd import code
+
+    spy = mocker.spy(code.scheduler, "run")
+    dbg = mocker.patch("async_eval.ext.pydevd.code.get_global_debugger").return_value
+    thread_id = object()
+
+    assert code.evaluate_expression(thread_id, object(), "await regular()", True) == 10
+
+    spy.assert_called_once_with(
+        mocker.ANY,
+        lane=code.Lane.EXPRESSION,
+        client=dbg.writer,
+        loop=thread_id,
+        key=(id(frame), "await regular()"),
+    )
+
+
+def test_console_scheduled(mocker):
+    _, frame = paused_frame()
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+    mocker.patch("sys.displayhook")
+
+    from async_eval.ext.pydevd import code
+
+    spy = mocker.spy(code.scheduler, "run")
+    thread_id, dbg = object(), MagicMock()
+
+    assert code.console_exec(thread_id, object(), "await regular()", dbg) == (False, False)
+
+    spy.assert_called_once_with(mocker.ANY, lane=code.Lane.CONSOLE, client=dbg.writer, loop=thread_id, key=None)
+
+
+def test_request_client():
+    from async_eval.ext.pydevd.code import request_client
+
+    dbg = object()
+
+    assert request_client() is None
+    assert request_client(dbg) is dbg
+
+
+@sync_params_mark
 def test_console_integration(mocker, code, result):
     mock = mocker.patch("_pydevd_bundle.pydevd_console_integration.console_exec")
 
@@ -74,6 +212,44 @@ def test_console_integration(mocker, code, result):
     )
 
 
+def test_console_integration_async(mocker, capsys):
+    _, frame = paused_frame()
+
+    mock = mocker.patch("_pydevd_bundle.pydevd_console_integration.console_exec")
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+
+    from async_eval.ext.pydevd.code import console_exec
+
+    assert console_exec(object(), object(), "await regular()", object()) == (False, False)
+    assert capsys.readouterr().out == "10\n"
+
+    from async_eval.ext.pydevd.code import scheduler
+
+    assert scheduler.metrics().completed == 1
+
+    mock.assert_not_called()
+
+
+def test_console_integration_async_frame_locals(mocker, capsys):
+    _, frame = paused_frame(client=regular)
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+
+    from async_eval.ext.pydevd.code import console_exec
+
+    assert console_exec(object(), object(), "await client() + number", object()) == (False, False)
+    assert capsys.readouterr().out == "20\n"
+
+
+def test_console_integration_async_raise_exc(mocker, capsys):
+    _, frame = paused_frame()
+    mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=frame)
+
+    from async_eval.ext.pydevd.code import console_exec
+
+    assert console_exec(object(), object(), "await raise_exc()", object()) == (False, True)
+    assert "MyException" in capsys.readouterr().err
+
+
 @params_mark
 def test_command_run(mocker, code, result):
     from _pydev_bundle.pydev_console_types import CodeFragment, Command
@@ -103,11 +279,7 @@ def test_make_code_async(code, result):
     reason="Not an issue for python 3.13+ because of PEP 667",
 )
 def test_evaluate_expression_should_update_locals(mocker):
-    def _with_locals():
-        yield
-        yield
-
-    g = _with_locals()
+    g, _ = paused_frame()
 
     mocker.patch("_pydevd_bundle.pydevd_vars.find_frame", return_value=g.gi_frame)
 
@@ -132,3 +304,69 @@ def test_pydevd_integration():
     _globals = _locals = {}
 
     exec(src, _globals, _locals)  # noqa: S102
+
+
+def test_save_locals_invalidate_completions():
+    _, frame = paused_frame()
+
+    from _pydevd_bundle import pydevd_save_locals
+
+    from async_eval.ext.pydevd import code
+
+    entry = code.completion_service._entry(frame)
+    pydevd_save_locals.save_locals(frame)
+
+    assert code.completion_service._entry(frame) is not entry
+
+
+@mark.parametrize(
+    ("act_tok", "comp"),
+    [
+        ("cli", '<comp p0="client" p1="async function" p2="" p3="2"/>'),
+        ("numb", '<comp p0="number" p1="int" p2="" p3="3"/>'),
+        ("AsyncContextManagerCl", '<comp p0="AsyncContextManagerClass" p1="type" p2="" p3="1"/>'),
+    ],
+)
+def test_completions(act_tok, comp):
+    _g, frame = paused_frame(client=regular)
+
+    from async_eval.ext.pydevd import code as _  # noqa # isort:skip
+    from _pydev_bundle import _pydev_completer
+
+    assert _pydev_completer.generate_completions_as_xml(frame, act_tok) == f"<xml>{comp}</xml>"
+
+
+def test_completions_fallback():
+    _g, frame = paused_frame()
+
+    from async_eval.ext.pydevd import code as _  # noqa # isort:skip
+    from _pydev_bundle import _pydev_completer
+
+    assert 'p0="denominator"' in _pydev_completer.generate_completions_as_xml(frame, "number.real.deno")
+    assert _pydev_completer.generate_completions_as_xml(None, "deno") == "<xml></xml>"
+
+
+def test_completions_scheduled(mocker):
+    _g, frame = paused_frame(client=regular)
+
+    from async_eval.ext.pydevd import code
+
+    spy = mocker.spy(code.scheduler, "run")
+
+    assert 'p0="real"' in code.generate_completions_as_xml(frame, "(await client()).re")
+
+    spy.assert_called_once_with(
+        mocker.ANY,
+        lane=code.Lane.EXPRESSION,
+        client=None,
+        loop=None,
+        key=(id(frame), "await client()"),
+    )
+
+
+def test_completions_keywords():
+    _g, frame = paused_frame()
+
+    from async_eval.ext.pydevd import code
+
+    assert '<comp p0="for" p1="keyword" p2="" p3="3"/>' in code.generate_completions_as_xml(frame, "fo")
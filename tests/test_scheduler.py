@@ -0,0 +1,220 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pytest import fixture, mark, raises
+
+from async_eval.scheduler import EvaluationScheduler, Lane, SchedulerOverloaded, _current_loop
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+
+    while not predicate():
+        assert time.monotonic() < deadline, "timeout"
+        time.sleep(0.001)
+
+
+@fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        yield pool
+
+
+@fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def _blocker(scheduler, pool, release, loop="loop", **kwargs):
+    started = threading.Event()
+
+    def _block():
+        started.set()
+        release.wait(5)
+        return "blocker"
+
+    fut = pool.submit(scheduler.run, _block, loop=loop, **kwargs)
+    started.wait(5)
+
+    return fut
+
+
+def test_run():
+    scheduler = EvaluationScheduler()
+
+    assert scheduler.run(lambda: 10) == 10
+
+    metrics = scheduler.metrics()
+    assert metrics.submitted == metrics.completed == 1
+    assert metrics.running == 0
+    assert metrics.queued == {Lane.CONDITION: 0, Lane.EXPRESSION: 0, Lane.CONSOLE: 0}
+
+
+def test_run_raise_exc():
+    scheduler = EvaluationScheduler()
+
+    with raises(ZeroDivisionError):
+        scheduler.run(lambda: 1 / 0, key="expr")
+
+    assert scheduler.metrics().completed == 1
+    assert scheduler.run(lambda: 10, key="expr") == 10
+
+
+def test_priority_lanes(pool, release):
+    scheduler = EvaluationScheduler()
+    order = []
+
+    blocker = _blocker(scheduler, pool, release)
+
+    futures = []
+    for lane in (Lane.CONSOLE, Lane.EXPRESSION, Lane.CONSOLE):
+        futures.append(pool.submit(scheduler.run, lambda lane=lane: order.append(lane), lane=lane, loop="loop"))
+        _wait_for(lambda n=len(futures): sum(scheduler.metrics().queued.values()) == n)
+
+    metrics = scheduler.metrics()
+    assert metrics.queued == {Lane.CONDITION: 0, Lane.EXPRESSION: 1, Lane.CONSOLE: 2}
+    assert metrics.max_queued == 3
+
+    release.set()
+
+    assert blocker.result() == "blocker"
+    for fut in futures:
+        fut.result()
+
+    assert order == [Lane.EXPRESSION, Lane.CONSOLE, Lane.CONSOLE]
+    assert scheduler.metrics().wait_time > 0
+
+
+def test_per_client_limit(pool, release):
+    scheduler = EvaluationScheduler(max_concurrency=2, per_client_limit=1)
+
+    blocker = _blocker(scheduler, pool, release, client="a")
+
+    same_client = pool.submit(scheduler.run, lambda: "a", client="a", loop="loop")
+    _wait_for(lambda: scheduler.metrics().queued[Lane.CONSOLE] == 1)
+
+    assert scheduler.run(lambda: "b", client="b", loop="loop") == "b"
+    assert not same_client.done()
+
+    release.set()
+
+    assert blocker.result() == "blocker"
+    assert same_client.result() == "a"
+
+
+def test_deduplication(pool, release):
+    scheduler = EvaluationScheduler()
+    calls = []
+
+    blocker = _blocker(scheduler, pool, release, key="expr")
+    follower = pool.submit(scheduler.run, lambda: calls.append(1), key="expr", loop="other")
+
+    _wait_for(lambda: scheduler.metrics().deduplicated == 1)
+    release.set()
+
+    assert blocker.result() == follower.result() == "blocker"
+    assert not calls
+    assert scheduler.metrics().submitted == 1
+
+
+def test_deduplication_raise_exc(pool, release):
+    scheduler = EvaluationScheduler()
+
+    def _fail():
+        release.wait(5)
+        raise ZeroDivisionError
+
+    leader = pool.submit(scheduler.run, _fail, key="expr")
+    _wait_for(lambda: scheduler.metrics().running == 1)
+
+    follower = pool.submit(scheduler.run, lambda: 10, key="expr")
+    _wait_for(lambda: scheduler.metrics().deduplicated == 1)
+    release.set()
+
+    with raises(ZeroDivisionError):
+        leader.result()
+
+    with raises(ZeroDivisionError):
+        follower.result()
+
+
+def test_backpressure(pool, release):
+    scheduler = EvaluationScheduler(max_queue=1)
+
+    blocker = _blocker(scheduler, pool, release)
+    queued = pool.submit(scheduler.run, lambda: 10, loop="loop")
+    _wait_for(lambda: scheduler.metrics().queued[Lane.CONSOLE] == 1)
+
+    with raises(SchedulerOverloaded):
+        scheduler.run(lambda: 20, loop="loop")
+
+    assert scheduler.run(lambda: 30, lane=Lane.CONDITION, loop="loop") == 30
+
+    assert scheduler.metrics().rejected == 1
+
+    release.set()
+
+    assert blocker.result() == "blocker"
+    assert queued.result() == 10
+
+
+def test_nested_run():
+    scheduler = EvaluationScheduler()
+
+    assert scheduler.run(lambda: scheduler.run(lambda: 10, lane=Lane.CONDITION) * 2) == 20
+    assert scheduler.metrics().submitted == 1
+
+
+def test_independent_loops(pool, release):
+    scheduler = EvaluationScheduler()
+
+    blocker = _blocker(scheduler, pool, release, loop="a")
+
+    assert scheduler.run(lambda: "b", loop="b") == "b"
+    assert scheduler.run(lambda: "c") == "c"
+    assert not blocker.done()
+
+    release.set()
+
+    assert blocker.result() == "blocker"
+
+
+def test_condition_not_blocked_by_console(pool, release):
+    scheduler = EvaluationScheduler()
+
+    blocker = _blocker(scheduler, pool, release)
+    console = pool.submit(scheduler.run, lambda: "console", loop="loop")
+    _wait_for(lambda: scheduler.metrics().queued[Lane.CONSOLE] == 1)
+
+    assert scheduler.run(lambda: "condition", lane=Lane.CONDITION, loop="loop") == "condition"
+    assert not console.done()
+
+    release.set()
+
+    assert blocker.result() == "blocker"
+    assert console.result() == "console"
+
+
+def test_condition_from_awaited_thread(pool):
+    scheduler = EvaluationScheduler()
+
+    def _console():
+        # console command waits for thread that hits breakpoint with condition
+        condition = pool.submit(scheduler.run, lambda: True, lane=Lane.CONDITION, loop="loop")
+        return condition.result(timeout=5)
+
+    assert scheduler.run(_console, loop="loop")
+    assert scheduler.metrics().completed == 2
+
+
+def test_current_loop():
+    assert _current_loop() == threading.get_ident()
+
+
+@mark.asyncio
+async def test_current_loop_running():
+    assert _current_loop() is asyncio.get_running_loop()
@@ -1,4 +1,5 @@
-from typing import Any, AsyncContextManager, AsyncIterator, NoReturn
+from types import FrameType, FunctionType
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Generator, NoReturn, Optional, Tuple
 
 
 class MyException(Exception):
@@ -30,11 +31,31 @@ def raise_exc() -> NoReturn:
     raise MyException
 
 
+def _paused(client: Any = None, coro_func: Any = regular, number: int = 10) -> Generator[None, None, None]:
+    yield
+    yield
+
+
+def paused_frame(
+    _globals: Optional[Dict[str, Any]] = None,
+    **f_locals: Any,
+) -> Tuple[Generator[None, None, None], FrameType]:
+    func = _paused
+    if _globals is not None:
+        func = FunctionType(_paused.__code__, _globals, _paused.__name__, _paused.__defaults__)
+
+    g = func(**f_locals)
+    next(g)
+
+    return g, g.gi_frame  # type: ignore
+
+
 __all__ = [
     "AsyncContextManagerClass",
     "MyException",
     "ctxmanager",
     "generator",
+    "paused_frame",
     "raise_exc",
     "regular",
 ]